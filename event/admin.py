@@ -4,7 +4,14 @@ from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
 from django.utils.translation import gettext_lazy as _
 
-from event.models import Event, EventParticipant, Review, User
+from event.models import (
+    Event,
+    EventParticipant,
+    Notification,
+    Review,
+    ReviewUpload,
+    User,
+)
 
 
 class UserAdmin(UserAdmin):
@@ -53,6 +60,10 @@ class EventAdmin(admin.ModelAdmin):
         "address",
         "description",
         "start_at",
+        "capacity",
+        "participants_count",
+        "reviews_count",
+        "last_review_at",
     )
     list_filter = (
         "start_at",
@@ -60,6 +71,13 @@ class EventAdmin(admin.ModelAdmin):
     )
     search_fields = ("title",)
 
+    def save_formset(self, request, form, formset, change):
+        super().save_formset(request, form, formset, change)
+        if formset.model is EventParticipant:
+            event = form.instance
+            event.participants_count = event.event_participants.count()
+            event.save(update_fields=["participants_count"])
+
 
 @register(Review)
 class EventAdmin(admin.ModelAdmin):
@@ -77,5 +95,36 @@ class EventAdmin(admin.ModelAdmin):
     search_fields = ("title",)
 
 
+@register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        "event",
+        "kind",
+        "email",
+        "status",
+        "attempts",
+        "created_at",
+        "sent_at",
+    )
+    list_filter = (
+        "status",
+        "kind",
+    )
+
+
+@register(ReviewUpload)
+class ReviewUploadAdmin(admin.ModelAdmin):
+    list_display = (
+        "review",
+        "filename",
+        "size",
+        "offset",
+        "status",
+        "created_at",
+        "processed_at",
+    )
+    list_filter = ("status",)
+
+
 admin.site.register(User, UserAdmin)
 admin.site.unregister(Group)
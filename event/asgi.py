@@ -0,0 +1,66 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+
+# сколько байт потокового ответа читается за один переход в синхронный поток
+STREAMING_BLOCK_SIZE = 64 * 1024
+
+
+def read_block(parts, size=STREAMING_BLOCK_SIZE):
+    """
+    Части потокового ответа, склеенные в блок не меньше size байт.
+    Пустой блок - ответ закончился
+    """
+    block = []
+    length = 0
+    for part in parts:
+        block.append(part)
+        length += len(part)
+        if length >= size:
+            break
+    return b"".join(block)
+
+
+async def iterate_streaming(parts):
+    """
+    Блоки частей потокового ответа для отправки из event loop. Генераторы
+    выгрузки (event.export) обращаются к БД, поэтому части читаются в
+    синхронном потоке Django, в соединении, где выполнялось представление
+    """
+    parts = iter(parts)
+    while True:
+        block = await sync_to_async(read_block, thread_sensitive=True)(parts)
+        if not block:
+            return
+        yield block
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """
+    Django 3.2 перебирает потоковый ответ прямо в event loop, и запрос к БД
+    из генератора выгрузки падает с SynchronousOnlyOperation. Части ответа
+    отправляются перед завершающим сообщением, а читаются iterate_streaming
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        blocks = iterate_streaming(iter(response))
+        # заголовки и завершение ответа отправляет Django, тело - здесь
+        response.streaming_content = []
+
+        async def send_blocks(message):
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body"
+            ):
+                async for block in blocks:
+                    for chunk, _ in self.chunk_bytes(block):
+                        await send(
+                            {
+                                "type": "http.response.body",
+                                "body": chunk,
+                                "more_body": True,
+                            }
+                        )
+            await send(message)
+
+        await super().send_response(response, send_blocks)
@@ -0,0 +1,80 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import AsyncToSync, sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from event.db import check_connections, mark_connections_used
+
+
+@functools.lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.ASYNC_VIEW_THREADS, thread_name_prefix="async-view"
+    )
+
+
+def has_sync_caller():
+    """
+    Представление вызвано из синхронного кода через async_to_sync
+    (тестовый клиент): тогда оно выполняется в вызывающем потоке, с его
+    соединением и транзакцией
+    """
+    return hasattr(AsyncToSync.executors, "current")
+
+
+def async_view(view):
+    """
+    Асинхронная обертка DRF-представления для ASGI (ASYNC_VIEWS). Django 3.2
+    выполняет все синхронные представления процесса в одном потоке, а
+    асинхронного ORM в нем нет, поэтому представление выполняется в пуле из
+    ASYNC_VIEW_THREADS потоков: медленные запросы не блокируют ни event
+    loop, ни друг друга, а число потоков и соединений с БД ограничено.
+    Соединения потоков пула постоянные (DB_CONN_MAX_AGE) и проверяются
+    так же, как соединения обычного запроса. Под WSGI представление
+    возвращается без обертки.
+    """
+    if not settings.ASYNC_VIEWS:
+        return view
+
+    def run(request, *args, **kwargs):
+        # сигналы request_started/request_finished обслуживают соединения
+        # другого потока, соединения потока пула проверяются здесь
+        close_old_connections()
+        check_connections()
+        try:
+            response = view(request, *args, **kwargs)
+            # ответ рендерится в том же потоке, а не в общем потоке Django
+            if hasattr(response, "render"):
+                response.render()
+            return response
+        finally:
+            close_old_connections()
+            mark_connections_used()
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if has_sync_caller():
+            return await sync_to_async(view)(request, *args, **kwargs)
+        return await sync_to_async(
+            run, thread_sensitive=False, executor=get_executor()
+        )(request, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncViewSetMixin:
+    """
+    Маршруты ViewSet, обслуживающие действия из async_actions, получают
+    асинхронную обертку async_view
+    """
+
+    async_actions = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if actions and set(actions.values()) & set(cls.async_actions):
+            return async_view(view)
+        return view
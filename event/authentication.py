@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+User = get_user_model()
+
+TOKEN_SALT = "event.authentication.token"
+
+
+def make_token(user):
+    """
+    Подписанный (HMAC) токен с id пользователя и хэшем его пароля:
+    смена пароля делает ранее выданные токены недействительными
+    """
+    return signing.dumps(
+        {"id": user.pk, "h": user.get_session_auth_hash()},
+        salt=TOKEN_SALT,
+        compress=True,
+    )
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Аутентификация по заголовку "Authorization: Token <токен>".
+    Проверка токена - это проверка HMAC-подписи и выборка пользователя по
+    первичному ключу, без вычисления PBKDF2-хэша пароля на каждый запрос
+    """
+
+    keyword = "Token"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("Неверный заголовок токена")
+        try:
+            payload = signing.loads(
+                auth[1].decode(),
+                salt=TOKEN_SALT,
+                max_age=settings.AUTH_TOKEN_MAX_AGE,
+            )
+        except (signing.BadSignature, UnicodeError):
+            raise AuthenticationFailed("Недействительный токен")
+        user = User.objects.filter(pk=payload["id"], is_active=True).first()
+        if user is None or not constant_time_compare(
+            payload["h"], user.get_session_auth_hash()
+        ):
+            raise AuthenticationFailed("Недействительный токен")
+        return user, None
+
+    def authenticate_header(self, request):
+        return self.keyword
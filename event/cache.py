@@ -0,0 +1,176 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+VERSION_KEY = "event:version"
+HITS_KEY = "event:hits"
+MISSES_KEY = "event:misses"
+# кэши, не общие для процессов: версии, измененные командой или другим
+# воркером, не доходили бы до воркера, отдающего ответ
+LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def get_cache():
+    return caches[settings.EVENT_CACHE_ALIAS]
+
+
+def is_event_cache_enabled():
+    """
+    Ответы кэшируются, только если кэш общий для процессов, или явно
+    разрешен кэш процесса (EVENT_CACHE_LOCAL, один процесс)
+    """
+    return settings.EVENT_CACHE_LOCAL or not isinstance(get_cache(), LOCAL_CACHES)
+
+
+def get_version_key(event_id=None):
+    return VERSION_KEY if event_id is None else f"{VERSION_KEY}:{event_id}"
+
+
+def get_event_cache_version(event_id=None):
+    """
+    Версия кэша - время последнего изменения, входит в ключи кэша и
+    используется как Last-Modified. Общая версия меняется при изменении
+    самих событий, версия события - еще и при изменении его участников и
+    отзывов
+    """
+    cache = get_cache()
+    keys = [get_version_key()]
+    if event_id is not None:
+        keys.append(get_version_key(event_id))
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time(), None)
+            versions[key] = cache.get(key)
+    return max(versions.values())
+
+
+def invalidate_event_cache(event_ids=None):
+    """
+    Сбрасывает кэш карточек событий event_ids, а без event_ids - весь кэш
+    событий. Списки после изменения участников и отзывов обновляются не
+    позже чем через EVENT_LIST_CACHE_TIMEOUT. Версия меняется сразу и еще
+    раз после коммита транзакции, чтобы параллельный запрос не закэшировал
+    данные, прочитанные до коммита
+    """
+    if event_ids is None:
+        keys = [get_version_key()]
+    else:
+        keys = [get_version_key(event_id) for event_id in event_ids]
+
+    def bump():
+        get_cache().set_many(dict.fromkeys(keys, time.time()), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def get_last_modified(version):
+    """
+    Last-Modified с точностью до секунды или None, пока не закончилась
+    секунда изменения: иначе следующее изменение в ту же секунду не
+    изменило бы Last-Modified, и условный запрос получил бы устаревший 304
+    """
+    last_modified = int(version)
+    if time.time() < last_modified + 1:
+        return None
+    return last_modified
+
+
+def count_cache_access(key):
+    cache = get_cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # ключ вытеснен из кэша между add и incr
+        pass
+
+
+def get_event_cache_stats():
+    cache = get_cache()
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+    }
+
+
+class EventCacheMixin:
+    """
+    Кэширует ответы list/retrieve по пути и нормализованной строке запроса,
+    добавляет ETag/Last-Modified и отвечает 304 на условные запросы.
+    Карточка события сбрасывается по версии события, списки - по общей
+    версии и не реже раза в EVENT_LIST_CACHE_TIMEOUT.
+    Ответ автору события (со списком участников) не кэшируется.
+    С кэшем процесса (locmem) ответы не кэшируются, см. is_event_cache_enabled
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request, version):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        digest = hashlib.md5(f"{request.path}?{query}".encode()).hexdigest()
+        return f"event:{version}:{digest}"
+
+    def get_cache_version(self):
+        """
+        Версия и время жизни ответа: для списков версия - начало текущего
+        интервала EVENT_LIST_CACHE_TIMEOUT, если оно позже общей версии
+        """
+        if "pk" in self.kwargs:
+            version = get_event_cache_version(self.kwargs["pk"])
+            return version, settings.EVENT_CACHE_TIMEOUT
+        timeout = settings.EVENT_LIST_CACHE_TIMEOUT
+        interval = time.time() // timeout * timeout
+        return max(get_event_cache_version(), interval), timeout
+
+    @staticmethod
+    def is_owner(request, owner):
+        return owner is not None and owner == request.user.id
+
+    def get_cached_response(self, method, request, *args, **kwargs):
+        if not is_event_cache_enabled():
+            return method(request, *args, **kwargs)
+        version, timeout = self.get_cache_version()
+        key = self.get_cache_key(request, version)
+        etag = quote_etag(hashlib.md5(f"{key}:{request.user.id}".encode()).hexdigest())
+        last_modified = get_last_modified(version)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        cache = get_cache()
+        entry = cache.get(key)
+        if entry is not None and not self.is_owner(request, entry["owner"]):
+            count_cache_access(HITS_KEY)
+            response = Response(entry["data"])
+            response["X-Cache"] = "HIT"
+        else:
+            count_cache_access(MISSES_KEY)
+            response = method(request, *args, **kwargs)
+            response["X-Cache"] = "MISS"
+            owner = None
+            if "pk" in self.kwargs:
+                owner = self.get_object().user_id
+            if response.status_code == 200 and not self.is_owner(request, owner):
+                cache.set(key, {"data": response.data, "owner": owner}, timeout)
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
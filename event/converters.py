@@ -0,0 +1,159 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from event.pagination import get_ordering_fields
+from event.profiling import timed
+
+# поля, представление которых совпадает со значением из БД
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.EmailField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def datetime_converter(field, model_field):
+    """
+    Часовой пояс и формат DATETIME_FORMAT определяются один раз на
+    страницу, а не для каждого значения, как в DateTimeField
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None:
+        return lambda request: lambda value: value
+
+    def bind(request):
+        field_timezone = getattr(field, "timezone", field.default_timezone())
+
+        def convert(value):
+            if field_timezone is None or not timezone.is_aware(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone)
+            if output_format.lower() != ISO_8601:
+                return value.strftime(output_format)
+            value = value.isoformat()
+            if value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+            return value
+
+        return convert
+
+    return bind
+
+
+def file_converter(field, model_field):
+    storage = model_field.storage
+    use_url = getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL)
+
+    def bind(request):
+        def convert(name):
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return convert
+
+    return bind
+
+
+# фабрики преобразований: по полю сериализатора и модели возвращают функцию,
+# которая по запросу возвращает преобразование значения
+CONVERTERS = {
+    serializers.DateTimeField: datetime_converter,
+    serializers.FileField: file_converter,
+}
+
+
+class RowConverter:
+    """
+    Представление строк .values() в том же виде, что и у сериализатора, без
+    создания объектов моделей и обхода полей DRF на каждую строку. Значения
+    простых полей копируются как есть, дата и время форматируются полем
+    сериализатора (DATETIME_FORMAT), файлы - как ссылки FileField
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        model = serializer_class.Meta.model
+        self.fields = []
+        self.converted = []
+        for field in serializer_class().fields.values():
+            if field.write_only:
+                continue
+            if fields is not None and field.field_name not in fields:
+                continue
+            if "." in field.source or field.source == "*":
+                raise TypeError(f"Поле {field.field_name} не поддерживается")
+            model_field = model._meta.get_field(field.source)
+            if type(field) in CONVERTERS:
+                self.converted.append(
+                    (field.field_name, CONVERTERS[type(field)](field, model_field))
+                )
+            elif type(field) not in PLAIN_FIELDS:
+                raise TypeError(f"Поле {field.field_name} не поддерживается")
+            self.fields.append((field.field_name, model_field.attname))
+        self.columns = [column for _, column in self.fields]
+
+    def convert(self, rows, request=None):
+        fields = self.fields
+        converted = [(name, bind(request)) for name, bind in self.converted]
+        result = []
+        with timed("serializer"):
+            for row in rows:
+                item = {name: row[column] for name, column in fields}
+                for name, convert in converted:
+                    value = item[name]
+                    if value is not None:
+                        item[name] = convert(value)
+                result.append(item)
+        return result
+
+
+@lru_cache(maxsize=None)
+def get_row_converter(serializer_class, fields=None):
+    """
+    RowConverter сериализатора (только полей fields, если они заданы) или
+    None, если среди полей есть те, что нельзя получить из .values()
+    (SerializerMethodField, вложенные и т.п.)
+    """
+    try:
+        return RowConverter(serializer_class, fields)
+    except (TypeError, AttributeError, FieldDoesNotExist):
+        return None
+
+
+class ValuesListMixin:
+    """
+    list выбирает из БД только столбцы полей сериализатора (.values()) и
+    отдает строки через RowConverter. Если сериализатор не поддерживается,
+    используется обычный путь DRF. Поля сортировки выбираются для курсора
+    пагинации, даже если их нет в ответе
+    """
+
+    def get_sparse_fields(self, serializer_class):
+        # переопределяется SparseFieldsMixin
+        return None
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        converter = get_row_converter(
+            serializer_class, self.get_sparse_fields(serializer_class)
+        )
+        if converter is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = get_ordering_fields(queryset, self) - set(converter.columns)
+        queryset = queryset.values(*converter.columns, *sorted(ordering))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(converter.convert(page, request))
+        return Response(converter.convert(queryset, request))
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+def check_connections(**kwargs):
+    """
+    Перед запросом закрывает постоянные соединения с БД, которые
+    простаивали дольше DB_HEALTH_CHECK_INTERVAL и не отвечают (БД или
+    пулер перезапущены), иначе запрос получил бы ошибку. Недавно
+    использованные соединения не проверяются, лишнего запроса к БД нет
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        last_used_at = getattr(connection, "last_used_at", None)
+        if connection.connection is None or last_used_at is None:
+            continue
+        if now - last_used_at < settings.DB_HEALTH_CHECK_INTERVAL:
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def mark_connections_used(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.last_used_at = now
+
+
+def server_side_cursors_disabled(alias):
+    """
+    За пулером в transaction mode (PgBouncer) серверные курсоры недоступны
+    """
+    return connections[alias].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS", False)
@@ -0,0 +1,86 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+from event.db import server_side_cursors_disabled
+
+REVIEW_EXPORT_FIELDS = (
+    "id",
+    "author_id",
+    "author__username",
+    "text",
+    "file",
+    "pub_date",
+)
+
+
+class Echo:
+    """
+    Псевдо-файл для csv.writer: строка возвращается, а не записывается
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(fields, rows):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + "\n"
+
+
+def iterate_rows(queryset, fields):
+    """
+    Строки queryset (упорядоченного по id, id входит в fields) пачками по
+    EXPORT_CHUNK_SIZE. Без серверных курсоров iterator() получил бы весь
+    результат в память сразу, поэтому пачки выбираются отдельными
+    запросами по id
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    if not server_side_cursors_disabled(queryset.db):
+        yield from queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+        return
+    position = fields.index("id")
+    chunk = queryset
+    while True:
+        rows = list(chunk.values_list(*fields)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        chunk = queryset.filter(id__gt=rows[-1][position])
+
+
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
+
+
+def export_response(request, queryset, fields, filename):
+    """
+    Потоковая выгрузка queryset в CSV (по умолчанию) или NDJSON
+    (?output=ndjson). Строки выбираются пачками по EXPORT_CHUNK_SIZE
+    (iterate_rows), поэтому расход памяти не зависит от кол-ва строк.
+    """
+    output = request.query_params.get("output", "csv")
+    if output not in EXPORT_FORMATS:
+        raise ValidationError(
+            {"output": f"Допустимые значения: {', '.join(EXPORT_FORMATS)}"}
+        )
+    stream, content_type = EXPORT_FORMATS[output]
+    rows = iterate_rows(queryset, fields)
+    response = StreamingHttpResponse(stream(fields, rows), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{output}"'
+    return response
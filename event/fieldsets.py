@@ -0,0 +1,89 @@
+from functools import lru_cache
+
+from rest_framework.exceptions import ValidationError
+
+from event.pagination import get_ordering_fields
+
+FIELDS_PARAM = "fields"
+EXCLUDE_PARAM = "exclude"
+
+
+def parse_names(value):
+    if not value:
+        return []
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+@lru_cache(maxsize=None)
+def get_readable_fields(serializer_class):
+    return tuple(
+        name
+        for name, field in serializer_class().fields.items()
+        if not field.write_only
+    )
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=id,title - в ответе только перечисленные поля,
+    ?exclude=description - все поля, кроме перечисленных. Столбцы модели,
+    которых нет в ответе, не выбираются из БД (only()/defer()), кроме
+    required_fields (нужны для проверки прав) и полей сортировки.
+    Действует для действий из sparse_actions
+    """
+
+    sparse_actions = ("list", "retrieve")
+    required_fields = ("id",)
+
+    def get_sparse_params(self):
+        if self.action not in self.sparse_actions:
+            return [], []
+        params = self.request.query_params
+        return (
+            parse_names(params.get(FIELDS_PARAM)),
+            parse_names(params.get(EXCLUDE_PARAM)),
+        )
+
+    def get_sparse_fields(self, serializer_class):
+        """
+        Поля serializer_class, которые нужно вернуть, или None, если
+        выбор полей не запрошен
+        """
+        fields, exclude = self.get_sparse_params()
+        if not fields and not exclude:
+            return None
+        available = get_readable_fields(serializer_class)
+        errors = {}
+        for param, names in ((FIELDS_PARAM, fields), (EXCLUDE_PARAM, exclude)):
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = [f"Неизвестные поля: {', '.join(unknown)}"]
+        if errors:
+            raise ValidationError(errors)
+        return tuple(
+            name
+            for name in available
+            if (not fields or name in fields) and name not in exclude
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        target = getattr(serializer, "child", serializer)
+        fields = self.get_sparse_fields(type(target))
+        if fields is not None:
+            for name in list(target.fields):
+                if name not in fields:
+                    del target.fields[name]
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, exclude = self.get_sparse_params()
+        if not fields and not exclude:
+            return queryset
+        # имена полей сериализатора совпадают с именами полей модели
+        columns = {field.name for field in queryset.model._meta.concrete_fields}
+        required = {*self.required_fields, *get_ordering_fields(queryset, self)}
+        if fields:
+            return queryset.only(*sorted(columns & {*fields, *required}))
+        return queryset.defer(*sorted(columns & set(exclude) - required))
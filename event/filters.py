@@ -0,0 +1,49 @@
+from django.utils import timezone
+from django_filters import rest_framework as filters
+
+from event.models import Event
+
+
+class EventFilter(filters.FilterSet):
+    """
+    Фильтры событий, для каждого из которых есть индекс:
+    title__startswith - event_title_prefix_idx,
+    title__icontains, address__icontains - триграммные индексы (PostgreSQL),
+    type, user - составные индексы вместе с start_at
+    """
+
+    class Meta:
+        model = Event
+        fields = {
+            "title": ["exact", "startswith", "icontains"],
+            "address": ["exact", "icontains"],
+            "type": ["exact"],
+            "user": ["exact"],
+            "start_at": ["exact", "gte", "lte"],
+        }
+
+
+class UserEventFilter(filters.FilterSet):
+    """
+    Фильтры событий, на которые подана заявка текущего пользователя:
+    period=upcoming/past - предстоящие/прошедшие события
+    """
+
+    PERIODS = (
+        ("upcoming", "Предстоящие"),
+        ("past", "Прошедшие"),
+    )
+
+    period = filters.ChoiceFilter(choices=PERIODS, method="filter_period")
+
+    class Meta:
+        model = Event
+        fields = {
+            "type": ["exact"],
+            "start_at": ["gte", "lte"],
+        }
+
+    def filter_period(self, queryset, name, value):
+        if value == "upcoming":
+            return queryset.filter(start_at__gte=timezone.now())
+        return queryset.filter(start_at__lt=timezone.now())
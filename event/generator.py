@@ -0,0 +1,259 @@
+import csv
+import io
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from event.models import Event, EventParticipant, Review
+
+User = get_user_model()
+
+# параметр распределения Парето кол-ва участников обычных событий:
+# большинство событий малы, единицы собирают сотни участников
+PARETO_ALPHA = 1.2
+# доля заявок, приходящихся на "горячие" события
+HOT_SHARE = 0.3
+# на каждого модератора (автора событий) приходится столько пользователей
+USERS_PER_MODERATOR = 1000
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def copy_rows(cursor, table, columns, nullable, rows, batch_size):
+    """
+    Запись в PostgreSQL через COPY: CSV формируется пачками в памяти.
+    Строки в кавычках, None записывается как "" и в столбцах nullable
+    читается как NULL
+    """
+    options = "FORMAT csv"
+    if nullable:
+        options += f", FORCE_NULL ({', '.join(nullable)})"
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH ({options})"
+    for batch in batches(rows, batch_size):
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(batch)
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+
+
+def insert_rows(model, fields, rows, batch_size):
+    """
+    Записывает кортежи значений полей fields (уже подготовленных для БД)
+    в таблицу модели без создания объектов модели: COPY на PostgreSQL,
+    executemany на остальных БД. Прочие поля получают значения по умолчанию
+    """
+    defaults = [
+        (field, field.get_db_prep_save(field.get_default(), connection))
+        for field in model._meta.concrete_fields
+        if field.attname not in fields and not field.primary_key
+    ]
+    columns = [model._meta.get_field(name) for name in fields]
+    columns += [field for field, _ in defaults]
+    tail = tuple(value for _, value in defaults)
+    rows = (row + tail for row in rows)
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    names = [quote(field.column) for field in columns]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            nullable = [quote(field.column) for field in columns if field.null]
+            copy_rows(cursor, table, names, nullable, rows, batch_size)
+            return
+        sql = (
+            f"INSERT INTO {table} ({', '.join(names)}) "
+            f"VALUES ({', '.join(['%s'] * len(names))})"
+        )
+        for batch in batches(rows, batch_size):
+            cursor.executemany(sql, batch)
+
+
+def prepare(model, name, value):
+    return model._meta.get_field(name).get_db_prep_save(value, connection)
+
+
+def distribute(total, weights, limits):
+    """
+    Делит total пропорционально weights, не превышая limits: то, что не
+    поместилось в заполненные позиции, делится между остальными. Остаток от
+    округления достается позициям с наибольшей дробной частью
+    """
+    counts = [0] * len(weights)
+    remainder = total
+    active = [
+        number for number, weight in enumerate(weights) if weight and limits[number]
+    ]
+    while remainder > 0 and active:
+        weight_sum = sum(weights[number] for number in active)
+        shares = {
+            number: remainder * weights[number] / weight_sum for number in active
+        }
+        for number in active:
+            counts[number] += min(int(shares[number]), limits[number] - counts[number])
+        remainder = total - sum(counts)
+        for number in sorted(
+            active, key=lambda number: int(shares[number]) - shares[number]
+        ):
+            if remainder <= 0:
+                break
+            if counts[number] < limits[number]:
+                counts[number] += 1
+                remainder -= 1
+        active = [number for number in active if counts[number] < limits[number]]
+    return counts
+
+
+def get_attendance(rng, events, participants, users, hot_events):
+    """
+    Кол-во участников каждого события: HOT_SHARE заявок делят hot_events
+    случайных событий, остальные распределяются по всем событиям по Парето
+    """
+    hot = set(rng.sample(range(events), min(hot_events, events)))
+    weights = [rng.paretovariate(PARETO_ALPHA) for _ in range(events)]
+    hot_counts = distribute(
+        int(participants * HOT_SHARE),
+        [number in hot for number in range(events)],
+        [users] * events,
+    )
+    counts = distribute(
+        participants - sum(hot_counts),
+        weights,
+        [users - hot_count for hot_count in hot_counts],
+    )
+    return [count + hot_count for count, hot_count in zip(counts, hot_counts)]
+
+
+def generate_data(
+    users, events, participants, reviews, seed=0, hot_events=10, batch_size=10000
+):
+    """
+    Детерминированно (при одинаковом seed) создает пользователей, события,
+    заявки и отзывы для нагрузочного тестирования. Несколько событий
+    собирают большую часть заявок, активность пользователей неравномерна:
+    пользователи с меньшими номерами участвуют в большем кол-ве событий.
+    Отзывы оставляют участники прошедших событий. Счетчики участников и
+    отзывов событий согласованы с созданными строками. Возвращает кол-во
+    созданных строк каждой модели.
+    """
+    rng = random.Random(seed)
+    now = timezone.now().replace(minute=0, second=0, microsecond=0)
+    moderators = max(users // USERS_PER_MODERATOR, 1)
+    first_user = (User.objects.aggregate(Max("id"))["id__max"] or 0) + 1
+    first_event = (Event.objects.aggregate(Max("id"))["id__max"] or 0) + 1
+    password = make_password(None)
+    date_joined = prepare(User, "date_joined", now)
+    insert_rows(
+        User,
+        ("id", "username", "email", "password", "date_joined", "is_moderator"),
+        (
+            (
+                first_user + number,
+                f"user{first_user + number}",
+                f"user{first_user + number}@example.com",
+                password,
+                date_joined,
+                number >= users,
+            )
+            for number in range(users + moderators)
+        ),
+        batch_size,
+    )
+    counts = get_attendance(rng, events, participants, users, hot_events)
+    # отзывы распределяются по прошедшим событиям пропорционально участникам
+    start_at = [now + timedelta(hours=rng.randint(-24 * 365, 24 * 365)) for _ in counts]
+    past_counts = [
+        count if start < now else 0 for count, start in zip(counts, start_at)
+    ]
+    review_counts = distribute(reviews, past_counts, past_counts)
+    # участники события - последовательные пользователи, начиная со
+    # смещения, смещенного к началу: активные пользователи встречаются чаще
+    offsets = [int(users * rng.random() ** 3) for _ in counts]
+    insert_rows(
+        Event,
+        (
+            "id",
+            "user_id",
+            "title",
+            "type",
+            "address",
+            "description",
+            "start_at",
+            "participants_count",
+            "reviews_count",
+            "last_review_at",
+        ),
+        (
+            (
+                first_event + number,
+                first_user + users + number % moderators,
+                f"Событие {first_event + number}",
+                Event.TYPE.values[number % len(Event.TYPE.values)],
+                f"Адрес {number % 1000}",
+                "Описание события",
+                prepare(Event, "start_at", start_at[number]),
+                counts[number],
+                review_counts[number],
+                prepare(
+                    Event,
+                    "last_review_at",
+                    start_at[number] + timedelta(seconds=review_counts[number])
+                    if review_counts[number]
+                    else None,
+                ),
+            )
+            for number in range(events)
+        ),
+        batch_size,
+    )
+    insert_rows(
+        EventParticipant,
+        ("user_id", "event_id"),
+        (
+            (first_user + (offsets[number] + position) % users, first_event + number)
+            for number in range(events)
+            for position in range(counts[number])
+        ),
+        batch_size,
+    )
+    insert_rows(
+        Review,
+        ("author_id", "event_id", "text", "pub_date"),
+        (
+            (
+                first_user + (offsets[number] + position) % users,
+                first_event + number,
+                "Отзыв",
+                prepare(
+                    Review,
+                    "pub_date",
+                    start_at[number] + timedelta(seconds=position + 1),
+                ),
+            )
+            for number in range(events)
+            for position in range(review_counts[number])
+        ),
+        batch_size,
+    )
+    with connection.cursor() as cursor:
+        # id пользователей и событий заданы явно
+        for sql in connection.ops.sequence_reset_sql(no_style(), [User, Event]):
+            cursor.execute(sql)
+    return {
+        "users": users + moderators,
+        "events": events,
+        "participants": sum(counts),
+        "reviews": sum(review_counts),
+    }
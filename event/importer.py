@@ -0,0 +1,87 @@
+import codecs
+import csv
+import json
+import os
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from event.cache import invalidate_event_cache
+from event.models import Event
+from event.serializers import EventSerializer
+
+
+def read_csv(file):
+    for row in csv.DictReader(codecs.iterdecode(file, "utf-8-sig")):
+        # пустая ячейка означает отсутствующее значение (например, capacity)
+        yield {key: value for key, value in row.items() if value != ""}
+
+
+def read_ndjson(file):
+    for line in codecs.iterdecode(file, "utf-8-sig"):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # строка не проходит проверку сериализатором и попадает в ошибки
+            yield line
+
+
+IMPORT_FORMATS = {
+    ".csv": read_csv,
+    ".ndjson": read_ndjson,
+    ".jsonl": read_ndjson,
+}
+
+
+def get_reader(filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise ValidationError(
+            {"file": f"Допустимые расширения файла: {', '.join(IMPORT_FORMATS)}"}
+        )
+    return IMPORT_FORMATS[extension]
+
+
+def save_events(events):
+    with transaction.atomic():
+        Event.objects.bulk_create(events)
+
+
+def import_events(file, filename, user, batch_size=None):
+    """
+    Импортирует события из CSV или NDJSON (по одному объекту в строке),
+    файл читается построчно. Строки проверяются так же, как при создании
+    события через API, корректные записываются bulk_create пачками по
+    EVENT_IMPORT_BATCH_SIZE, каждая пачка - в своей транзакции. Ошибочные
+    строки не прерывают импорт и возвращаются вместе с номером строки.
+    """
+    read = get_reader(filename)
+    batch_size = batch_size or settings.EVENT_IMPORT_BATCH_SIZE
+    # один экземпляр сериализатора: поля и валидаторы строятся один раз
+    serializer = EventSerializer()
+    created, errors, events = 0, [], []
+    row_number = 0
+    try:
+        for row_number, row in enumerate(read(file), start=1):
+            try:
+                data = serializer.run_validation(row)
+            except ValidationError as error:
+                errors.append({"row": row_number, "errors": error.detail})
+                continue
+            events.append(Event(user=user, **data))
+            if len(events) >= batch_size:
+                save_events(events)
+                created += len(events)
+                events = []
+    except (UnicodeDecodeError, csv.Error) as error:
+        # дальше файл прочитать нельзя, уже проверенные строки сохраняются
+        errors.append({"row": row_number + 1, "errors": str(error)})
+    if events:
+        save_events(events)
+        created += len(events)
+    if created:
+        invalidate_event_cache()
+    return {"created": created, "errors": errors}
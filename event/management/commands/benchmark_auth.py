@@ -0,0 +1,50 @@
+import base64
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from event.authentication import make_token
+from event.serializers import LoginSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает кол-во запросов в секунду к /api/v1/my_events/ "
+        "с Basic-аутентификацией и с токеном"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--requests", type=int, default=100)
+
+    def run(self, client, count):
+        url = reverse("my_events")
+        start = time.perf_counter()
+        for _ in range(count):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"GET {url}: статус {response.status_code}")
+        return count / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        serializer = LoginSerializer(
+            data={"username": options["username"], "password": options["password"]}
+        )
+        if not serializer.is_valid():
+            raise CommandError("Неверное имя пользователя или пароль")
+        credentials = f"{options['username']}:{options['password']}"
+        basic_client = APIClient()
+        basic_client.credentials(
+            HTTP_AUTHORIZATION="Basic "
+            + base64.b64encode(credentials.encode()).decode()
+        )
+        token_client = APIClient()
+        token_client.credentials(
+            HTTP_AUTHORIZATION=f"Token {make_token(serializer.validated_data['user'])}"
+        )
+        for name, client in (("Basic", basic_client), ("Token", token_client)):
+            rps = self.run(client, options["requests"])
+            self.stdout.write(f"{name}: {rps:.1f} запросов/сек")
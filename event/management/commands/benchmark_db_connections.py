@@ -0,0 +1,80 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from event.authentication import make_token
+from event.serializers import LoginSerializer
+
+MODES = (
+    ("Новое соединение на запрос (CONN_MAX_AGE=0)", 0),
+    ("Постоянное соединение", None),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает задержку запроса к /api/v1/my_events/ (или --url), когда "
+        "соединение с БД открывается на каждый запрос и когда оно "
+        "переиспользуется"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--url", default=None)
+        parser.add_argument("--requests", type=int, default=200)
+
+    def set_max_age(self, max_age):
+        for connection in connections.all():
+            # close_at вычисляется при подключении
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = max_age
+
+    def run(self, client, url, count):
+        latencies = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.get(url)
+            # тестовый клиент не закрывает соединения по окончании запроса,
+            # как обработчик WSGI, поэтому это делается здесь
+            close_old_connections()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"GET {url}: статус {response.status_code}")
+        return latencies
+
+    def handle(self, *args, **options):
+        serializer = LoginSerializer(
+            data={"username": options["username"], "password": options["password"]}
+        )
+        if not serializer.is_valid():
+            raise CommandError("Неверное имя пользователя или пароль")
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {make_token(serializer.validated_data['user'])}"
+        )
+        url = options["url"] or reverse("my_events")
+        initial = {
+            connection.alias: connection.settings_dict["CONN_MAX_AGE"]
+            for connection in connections.all()
+        }
+        try:
+            for name, max_age in MODES:
+                self.set_max_age(max_age)
+                self.run(client, url, 1)
+                latencies = sorted(self.run(client, url, options["requests"]))
+                p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+                self.stdout.write(
+                    f"{name}: задержка, мс: среднее "
+                    f"{statistics.mean(latencies) * 1000:.2f}, "
+                    f"p50 {statistics.median(latencies) * 1000:.2f}, "
+                    f"p95 {p95 * 1000:.2f}"
+                )
+        finally:
+            for connection in connections.all():
+                connection.close()
+                connection.settings_dict["CONN_MAX_AGE"] = initial[connection.alias]
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from event.converters import get_row_converter
+from event.models import Event, Review
+from event.renderers import FastJSONRenderer
+from event.serializers import EventSerializer, ReviewSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время формирования страницы списка событий и отзывов: "
+        "ModelSerializer + JSONRenderer и .values() + RowConverter + "
+        "FastJSONRenderer. Выводится время с выборкой из БД и без нее"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--rounds", type=int, default=10)
+
+    def measure(self, func, rounds):
+        func()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return (time.perf_counter() - start) / rounds * 1000
+
+    def handle(self, *args, **options):
+        request = APIRequestFactory().get("/")
+        items, rounds = options["items"], options["rounds"]
+        for serializer_class, model in (
+            (EventSerializer, Event),
+            (ReviewSerializer, Review),
+        ):
+            queryset = model.objects.order_by("id")[:items]
+            converter = get_row_converter(serializer_class)
+            objects = list(queryset)
+            rows = list(queryset.values(*converter.columns))
+            if len(rows) < items:
+                raise CommandError(
+                    f"{model.__name__}: в БД {len(rows)} строк, нужно {items}"
+                )
+            context = {"request": request}
+
+            def serialize(objects):
+                data = serializer_class(objects, many=True, context=context).data
+                return JSONRenderer().render(data)
+
+            def convert(rows):
+                return FastJSONRenderer().render(converter.convert(rows, request))
+
+            if serialize(objects) != convert(rows):
+                raise CommandError(f"{model.__name__}: ответы различаются")
+            results = [
+                self.measure(lambda: serialize(objects), rounds),
+                self.measure(lambda: convert(rows), rounds),
+                self.measure(lambda: serialize(queryset.all()), rounds),
+                self.measure(
+                    lambda: convert(queryset.values(*converter.columns)), rounds
+                ),
+            ]
+            self.stdout.write(
+                f"{model.__name__}, {items} шт.: сериализация "
+                f"{results[0]:.1f} -> {results[1]:.1f} мс "
+                f"(x{results[0] / results[1]:.1f}), с выборкой "
+                f"{results[2]:.1f} -> {results[3]:.1f} мс "
+                f"(x{results[2] / results[3]:.1f})"
+            )
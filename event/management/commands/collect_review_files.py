@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from event.uploads import collect_review_files, get_unused_review_files
+
+
+class Command(BaseCommand):
+    help = "Удаляет файлы и превью отзывов, на которые не осталось ссылок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить хранилище и сообщить о файлах без ссылок",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            names = list(get_unused_review_files())
+            if names:
+                raise CommandError(f"Файлы без ссылок: {', '.join(names)}")
+            self.stdout.write("Файлов без ссылок нет")
+            return
+        deleted = collect_review_files()
+        self.stdout.write(f"Удалено файлов: {deleted}")
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from event.generator import generate_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает синтетических пользователей, события, заявки и отзывы для "
+        "нагрузочного тестирования (при одинаковом --seed - одни и те же данные)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--events", type=int, default=100_000)
+        parser.add_argument("--participants", type=int, default=1_000_000)
+        parser.add_argument("--reviews", type=int, default=200_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--hot-events",
+            type=int,
+            default=10,
+            help="Кол-во событий, на которые приходится большая часть заявок",
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            created = generate_data(
+                options["users"],
+                options["events"],
+                options["participants"],
+                options["reviews"],
+                seed=options["seed"],
+                hot_events=options["hot_events"],
+                batch_size=options["batch_size"],
+            )
+        self.stdout.write(
+            f"Пользователей: {created['users']}, событий: {created['events']}, "
+            f"заявок: {created['participants']}, отзывов: {created['reviews']} "
+            f"за {time.perf_counter() - started:.1f} сек"
+        )
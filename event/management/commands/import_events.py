@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from event.importer import import_events
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Импортирует события из файла CSV или NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл .csv, .ndjson или .jsonl")
+        parser.add_argument(
+            "--username", required=True, help="Модератор - автор событий"
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(
+            username=options["username"], is_moderator=True
+        ).first()
+        if user is None:
+            raise CommandError(f"Модератор {options['username']} не найден")
+        with open(options["path"], "rb") as file:
+            try:
+                report = import_events(
+                    file, options["path"], user, options["batch_size"]
+                )
+            except ValidationError as error:
+                raise CommandError(error.detail["file"])
+        for error in report["errors"]:
+            self.stderr.write(f"Строка {error['row']}: {error['errors']}")
+        self.stdout.write(
+            f"Создано событий: {report['created']}, "
+            f"строк с ошибками: {len(report['errors'])}"
+        )
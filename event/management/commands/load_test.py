@@ -0,0 +1,146 @@
+import asyncio
+import os
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def get_children(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # поле 4 - pid родителя, имя процесса в скобках может содержать пробелы
+                parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if parent == pid:
+            children.append(int(entry))
+    return children
+
+
+def get_rss(pid):
+    """
+    Суммарная память (RSS, КБ) процесса и его потомков (воркеров gunicorn)
+    """
+    total = 0
+    for process in [pid, *get_children(pid)]:
+        try:
+            with open(f"/proc/{process}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест: много одновременных (в т.ч. медленных) клиентов "
+        "запрашивают URL, выводятся кол-во запросов в секунду, задержки и "
+        "память сервера. Позволяет сравнить режимы WSGI и ASGI при равной памяти"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Например, http://127.0.0.1:8000/api/v1/event/")
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument(
+            "--slow",
+            type=float,
+            default=0,
+            help="Время (сек) отправки заголовков запроса медленным клиентом",
+        )
+        parser.add_argument(
+            "--pid", type=int, default=None, help="pid мастер-процесса сервера"
+        )
+
+    async def request(self, host, port, raw, slow):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            if slow:
+                step = max(len(raw) // 10, 1)
+                for start in range(0, len(raw), step):
+                    writer.write(raw[start : start + step])
+                    await writer.drain()
+                    await asyncio.sleep(slow / 10)
+            else:
+                writer.write(raw)
+                await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+    async def client(self, host, port, raw, slow, deadline, latencies, errors):
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                status = await self.request(host, port, raw, slow)
+            except (OSError, IndexError, ValueError):
+                status = None
+            if status == 200:
+                latencies.append(time.monotonic() - started)
+            else:
+                errors.append(status)
+
+    async def run(self, options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Поддерживаются только URL вида http://host:port/path")
+        path = url.path or "/"
+        if url.query:
+            path = f"{path}?{url.query}"
+        raw = (
+            f"GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\n"
+            f"Connection: close\r\n\r\n"
+        ).encode()
+        latencies, errors, memory = [], [], [0]
+        deadline = time.monotonic() + options["duration"]
+        started = time.monotonic()
+        if options["pid"]:
+            sampler = asyncio.create_task(self.sample_rss(options["pid"], memory))
+        await asyncio.gather(
+            *(
+                self.client(
+                    url.hostname,
+                    url.port or 80,
+                    raw,
+                    options["slow"],
+                    deadline,
+                    latencies,
+                    errors,
+                )
+                for _ in range(options["concurrency"])
+            )
+        )
+        elapsed = time.monotonic() - started
+        if options["pid"]:
+            sampler.cancel()
+        return latencies, errors, elapsed, memory[0]
+
+    async def sample_rss(self, pid, memory):
+        while True:
+            memory[0] = max(memory[0], get_rss(pid))
+            await asyncio.sleep(0.5)
+
+    def handle(self, *args, **options):
+        latencies, errors, elapsed, rss = asyncio.run(self.run(options))
+        self.stdout.write(f"Клиентов: {options['concurrency']}")
+        self.stdout.write(f"Успешных запросов: {len(latencies)}, ошибок: {len(errors)}")
+        self.stdout.write(f"Запросов/сек: {len(latencies) / elapsed:.1f}")
+        if latencies:
+            latencies.sort()
+            p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+            self.stdout.write(
+                f"Задержка, мс: p50 {statistics.median(latencies) * 1000:.0f}, "
+                f"p95 {p95 * 1000:.0f}"
+            )
+        if options["pid"]:
+            self.stdout.write(f"Пиковая память сервера (RSS): {rss // 1024} МБ")
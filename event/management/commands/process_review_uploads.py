@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from event.uploads import process_review_uploads
+
+
+class Command(BaseCommand):
+    help = "Обрабатывает загруженные файлы отзывов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а ждать новые файлы",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Пауза (сек) между проверками пустой очереди в режиме --loop",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                processed = process_review_uploads(options["batch_size"])
+            except Exception as error:
+                if not options["loop"]:
+                    raise
+                self.stderr.write(f"Ошибка обработки файлов: {error}")
+                processed = 0
+            if processed:
+                self.stdout.write(f"Обработано файлов: {processed}")
+                continue
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
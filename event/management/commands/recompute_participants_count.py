@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from event.utils import (
+    get_inconsistent_participants_count,
+    recompute_participants_count,
+)
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счетчики участников событий по заявкам"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить счетчики и сообщить о расхождениях",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            events = get_inconsistent_participants_count()
+            if events:
+                raise CommandError(
+                    f"Счетчик участников расходится у событий: "
+                    f"{', '.join(map(str, events))}"
+                )
+            self.stdout.write("Счетчики участников согласованы")
+            return
+        updated = recompute_participants_count()
+        self.stdout.write(f"Пересчитаны счетчики событий: {updated}")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from event.utils import get_inconsistent_review_stats, recompute_review_stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает кол-во отзывов и дату последнего отзыва событий"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить статистику и сообщить о расхождениях",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            events = get_inconsistent_review_stats()
+            if events:
+                raise CommandError(
+                    f"Статистика отзывов расходится у событий: "
+                    f"{', '.join(map(str, events))}"
+                )
+            self.stdout.write("Статистика отзывов согласована")
+            return
+        updated = recompute_review_stats()
+        self.stdout.write(f"Пересчитана статистика событий: {updated}")
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from event.profiling import profiled
+from event.utils import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Отправляет уведомления организаторам из очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а ждать новые уведомления",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Пауза (сек) между проверками пустой очереди в режиме --loop",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                with profiled("send_notifications"):
+                    processed = send_queued_emails(options["batch_size"])
+            except Exception as error:
+                if not options["loop"]:
+                    raise
+                self.stderr.write(f"Ошибка отправки уведомлений: {error}")
+                processed = 0
+            if processed:
+                self.stdout.write(f"Обработано уведомлений: {processed}")
+                continue
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_participants_count(apps, schema_editor):
+    Event = apps.get_model("event", "Event")
+    EventParticipant = apps.get_model("event", "EventParticipant")
+    participants = (
+        EventParticipant.objects.filter(event=OuterRef("pk"))
+        .order_by()
+        .values("event")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Event.objects.update(participants_count=Coalesce(Subquery(participants), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0002_notification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="capacity",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Оставьте пустым, если кол-во мест не ограничено",
+                null=True,
+                verbose_name="Кол-во мест",
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="participants_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Кол-во участников"
+            ),
+        ),
+        migrations.RunPython(fill_participants_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+TRIGRAM_INDEXES = {
+    "event_title_trgm_idx": "title",
+    "event_address_trgm_idx": "address",
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    Индексы для icontains (UPPER(...) LIKE UPPER(...)), есть только в PostgreSQL
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON event_event "
+            f"USING gin (UPPER({column}::text) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0003_event_capacity"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["start_at", "id"], name="event_start_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["type", "start_at"], name="event_type_start_at_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["user", "start_at"], name="event_user_start_at_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["title"],
+                name="event_title_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0004_event_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["event", "-pub_date", "id"], name="review_event_pub_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_review_stats(apps, schema_editor):
+    Event = apps.get_model("event", "Event")
+    Review = apps.get_model("event", "Review")
+    reviews = Review.objects.filter(event=OuterRef("pk")).order_by()
+    Event.objects.update(
+        reviews_count=Coalesce(
+            Subquery(
+                reviews.values("event").annotate(count=Count("id")).values("count")
+            ),
+            0,
+        ),
+        last_review_at=Subquery(reviews.order_by("-pub_date").values("pub_date")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0005_review_pub_date_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="reviews_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Кол-во отзывов"
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="last_review_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                null=True,
+                verbose_name="Дата последнего отзыва",
+            ),
+        ),
+        migrations.RunPython(fill_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:30
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0006_event_review_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReviewUpload",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "filename",
+                    models.CharField(max_length=255, verbose_name="Имя файла"),
+                ),
+                (
+                    "content_type",
+                    models.CharField(max_length=100, verbose_name="Тип файла"),
+                ),
+                ("size", models.PositiveBigIntegerField(verbose_name="Размер файла")),
+                (
+                    "offset",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Загружено байт"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("UPLOADING", "Загружается"),
+                            ("PROCESSING", "Обрабатывается"),
+                            ("READY", "Готов"),
+                            ("REJECTED", "Отклонен"),
+                        ],
+                        default="UPLOADING",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "checksum",
+                    models.CharField(blank=True, max_length=64, verbose_name="SHA-256"),
+                ),
+                (
+                    "thumbnail",
+                    models.FileField(
+                        blank=True,
+                        upload_to="reviews/thumbnails/",
+                        verbose_name="Превью",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, verbose_name="Ошибка обработки"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Создано"),
+                ),
+                (
+                    "processed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Обработано"
+                    ),
+                ),
+                (
+                    "review",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload",
+                        to="event.review",
+                        verbose_name="Отзыв",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Загрузка файла отзыва",
+                "verbose_name_plural": "Загрузки файлов отзывов",
+                "ordering": ["created_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="reviewupload",
+            index=models.Index(
+                fields=["status", "created_at"], name="review_upload_queue_idx"
+            ),
+        ),
+    ]
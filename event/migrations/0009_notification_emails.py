@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0008_review_file_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="emails",
+            field=models.JSONField(
+                blank=True, default=list, verbose_name="Участники (email)"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="email",
+            field=models.EmailField(
+                blank=True, max_length=254, verbose_name="Участник (email)"
+            ),
+        ),
+    ]
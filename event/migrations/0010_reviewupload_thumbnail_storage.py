@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:54
+
+from django.db import migrations, models
+
+import event.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0009_notification_emails"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="reviewupload",
+            name="thumbnail",
+            field=models.FileField(
+                blank=True,
+                db_index=True,
+                storage=event.storage.ContentAddressedStorage(),
+                upload_to="reviews/thumbnails/",
+                verbose_name="Превью",
+            ),
+        ),
+    ]
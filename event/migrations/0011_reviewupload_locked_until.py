@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0010_reviewupload_thumbnail_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reviewupload",
+            name="locked_until",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Обрабатывается воркером до"
+            ),
+        ),
+    ]
@@ -1,10 +1,13 @@
+import uuid
 from datetime import datetime
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from event.storage import review_storage
 from event.validators import data_time_validator
 
 
@@ -74,9 +77,34 @@ class Event(models.Model):
     start_at = models.DateTimeField(
         verbose_name="Начало", validators=[data_time_validator]
     )
+    capacity = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Кол-во мест",
+        help_text="Оставьте пустым, если кол-во мест не ограничено",
+    )
+    participants_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Кол-во участников"
+    )
+    reviews_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Кол-во отзывов"
+    )
+    last_review_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Дата последнего отзыва"
+    )
 
     class Meta:
         ordering = ("start_at",)
+        indexes = [
+            models.Index(fields=["start_at", "id"], name="event_start_at_idx"),
+            models.Index(fields=["type", "start_at"], name="event_type_start_at_idx"),
+            models.Index(fields=["user", "start_at"], name="event_user_start_at_idx"),
+            models.Index(
+                fields=["title"],
+                name="event_title_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
         verbose_name = "Мероприятие"
         verbose_name_plural = "Мероприятия"
 
@@ -126,6 +154,8 @@ class Review(models.Model):
     )
     file = models.FileField(
         blank=True,
+        db_index=True,
+        storage=review_storage,
         upload_to="reviews/",
         verbose_name="Файл",
     )
@@ -138,8 +168,139 @@ class Review(models.Model):
 
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["event", "-pub_date", "id"], name="review_event_pub_date_idx"
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(fields=["author", "event"], name="unique_review"),
         ]
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
+
+
+class ReviewUpload(models.Model):
+    """
+    Загрузка файла отзыва по частям. Части дописываются во временный файл
+    (REVIEW_UPLOAD_TEMP_DIR), после загрузки последней части файл
+    обрабатывает воркер (manage.py process_review_uploads) и переносит его
+    в Review.file
+    """
+
+    class STATUS(models.TextChoices):
+        UPLOADING = "UPLOADING", _("Загружается")
+        PROCESSING = "PROCESSING", _("Обрабатывается")
+        READY = "READY", _("Готов")
+        REJECTED = "REJECTED", _("Отклонен")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    review = models.OneToOneField(
+        Review,
+        on_delete=models.CASCADE,
+        related_name="upload",
+        verbose_name="Отзыв",
+    )
+    filename = models.CharField(max_length=255, verbose_name="Имя файла")
+    content_type = models.CharField(max_length=100, verbose_name="Тип файла")
+    size = models.PositiveBigIntegerField(verbose_name="Размер файла")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="Загружено байт")
+    status = models.CharField(
+        choices=STATUS.choices,
+        default=STATUS.UPLOADING,
+        max_length=20,
+        verbose_name="Статус",
+    )
+    checksum = models.CharField(max_length=64, blank=True, verbose_name="SHA-256")
+    thumbnail = models.FileField(
+        blank=True,
+        db_index=True,
+        storage=review_storage,
+        upload_to="reviews/thumbnails/",
+        verbose_name="Превью",
+    )
+    error = models.TextField(blank=True, verbose_name="Ошибка обработки")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    processed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Обработано"
+    )
+    # загрузку обрабатывает воркер, после этого срока ее возьмет другой
+    locked_until = models.DateTimeField(
+        null=True, blank=True, verbose_name="Обрабатывается воркером до"
+    )
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"], name="review_upload_queue_idx"
+            ),
+        ]
+        verbose_name = "Загрузка файла отзыва"
+        verbose_name_plural = "Загрузки файлов отзывов"
+
+    def __str__(self):
+        return f"{self.filename} ({self.get_status_display()})"
+
+
+class Notification(models.Model):
+    class KIND(models.TextChoices):
+        REGISTRATION = "REGISTRATION", _("Новая заявка")
+        REVIEW = "REVIEW", _("Новый отзыв")
+
+    class STATUS(models.TextChoices):
+        PENDING = "PENDING", _("В очереди")
+        SENT = "SENT", _("Отправлено")
+        FAILED = "FAILED", _("Ошибка")
+
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name="notifications",
+        verbose_name="Мероприятие",
+    )
+    kind = models.CharField(
+        choices=KIND.choices,
+        max_length=20,
+        verbose_name="Тип уведомления",
+    )
+    email = models.EmailField(blank=True, verbose_name="Участник (email)")
+    # участники сводного уведомления о заявках одного массового запроса
+    emails = models.JSONField(
+        default=list, blank=True, verbose_name="Участники (email)"
+    )
+    status = models.CharField(
+        choices=STATUS.choices,
+        default=STATUS.PENDING,
+        max_length=20,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попыток отправки"
+    )
+    send_after = models.DateTimeField(
+        default=timezone.now, verbose_name="Отправить не раньше"
+    )
+    error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Отправлено")
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "send_after"], name="notification_queue_idx"
+            ),
+        ]
+        verbose_name = "Уведомление"
+        verbose_name_plural = "Уведомления"
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.event_id}, {self.email}"
+
+    @property
+    def recipients(self):
+        """
+        Участники, о которых сообщает уведомление
+        """
+        return self.emails or [self.email]
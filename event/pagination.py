@@ -0,0 +1,249 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DateTimeField, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Дата и время курсора кодируются с микросекундами: DjangoJSONEncoder
+    отбрасывает их до миллисекунд, и граница страницы промахивалась бы
+    мимо строк с тем же значением до миллисекунды
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная (keyset) пагинация: страница выбирается условием
+    WHERE (start_at, id) > (последние значения предыдущей страницы), поэтому
+    стоимость любой страницы одинакова. Порядок берется из order_by
+    queryset или из атрибута ordering view и всегда дополняется id.
+    Общее кол-во объектов (count) возвращается для совместимости,
+    ?count=false отключает лишний COUNT(*).
+    Если передан offset, используется прежняя LimitOffsetPagination.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "limit"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    offset_query_param = LimitOffsetPagination.offset_query_param
+    ordering = ("id",)
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.offset_pagination = None
+        if self.offset_query_param in request.query_params:
+            self.offset_pagination = LimitOffsetPagination()
+            return self.offset_pagination.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+        self.count = None
+        if request.query_params.get(self.count_query_param) != "false":
+            self.count = queryset.count()
+
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.parse_position(queryset.model, position)
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.reverse_field(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(ordering, position))
+
+        page = list(queryset[: self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[: self.page_size]
+        if reverse:
+            page.reverse()
+        self.page = page
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        ordering = list(
+            queryset.query.order_by or getattr(view, "ordering", None) or self.ordering
+        )
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            ordering.append("id")
+        return ordering
+
+    @staticmethod
+    def reverse_field(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def get_keyset_filter(ordering, position):
+        """
+        (a, b) > (x, y) для произвольного направления каждого поля:
+        a >= x AND (a > x OR (a = x AND b > y)). Граница a >= x позволяет
+        БД выбрать диапазон индекса по первому полю, а не фильтровать и
+        сортировать все строки до нужной страницы
+        """
+        keyset = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            keyset |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        field, value = ordering[0], position[0]
+        if len(ordering) > 1 and value is not None:
+            lookup = "lte" if field.startswith("-") else "gte"
+            keyset = Q(**{f"{field.lstrip('-')}__{lookup}": value}) & keyset
+        return keyset
+
+    def get_position(self, item):
+        fields = [field.lstrip("-") for field in self.ordering]
+        if isinstance(item, dict):
+            return [item["id" if field == "pk" else field] for field in fields]
+        return [getattr(item, field) for field in fields]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            position, reverse = cursor["p"], bool(cursor["r"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def parse_position(self, model, position):
+        """
+        Значения дат и времени курсора переводятся из ISO-строк обратно в
+        datetime без потери точности
+        """
+        parsed = []
+        for field, value in zip(self.ordering, position):
+            try:
+                model_field = model._meta.get_field(field.lstrip("-"))
+            except FieldDoesNotExist:
+                model_field = None
+            if isinstance(model_field, DateTimeField) and isinstance(value, str):
+                try:
+                    value = parse_datetime(value)
+                except ValueError:
+                    value = None
+                if value is None:
+                    raise NotFound(self.invalid_cursor_message)
+            parsed.append(value)
+        return parsed
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps({"p": position, "r": int(reverse)}, cls=CursorEncoder)
+        url = self.request.build_absolute_uri()
+        encoded = b64encode(cursor.encode("utf-8")).decode("ascii")
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[0]), True)
+
+    def get_paginated_response(self, data):
+        if self.offset_pagination is not None:
+            return self.offset_pagination.get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response["count"] = self.count
+        response["next"] = self.get_next_link()
+        response["previous"] = self.get_previous_link()
+        response["results"] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Курсор страницы из ссылок next/previous",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Кол-во объектов на странице",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "false - не возвращать общее кол-во объектов",
+                "schema": {"type": "boolean"},
+            },
+            {
+                "name": self.offset_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Пагинация через limit/offset (устаревшая)",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+def get_ordering_fields(queryset, view):
+    """
+    Поля модели, по которым KeysetPagination упорядочивает queryset и
+    строит курсор
+    """
+    return {
+        "id" if name == "pk" else name
+        for name in (
+            field.lstrip("-")
+            for field in KeysetPagination().get_ordering(queryset, view)
+            if isinstance(field, str)
+        )
+    }
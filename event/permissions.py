@@ -1,8 +1,8 @@
-from rest_framework.generics import get_object_or_404
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from rest_framework.authentication import get_authorization_header
 from rest_framework.permissions import BasePermission
 
-from event.models import Review, User
-
 
 class IsOwnerOrModeratorOrCreate(BasePermission):
     """
@@ -10,6 +10,7 @@ class IsOwnerOrModeratorOrCreate(BasePermission):
     Модератор может  просматривать/изменять любую информацию о пользователях
     Не модератор может просматривать информацию только о себе, изменять любые
     свои данные, кроме поля "модератор"
+    Пользователь проверяется на уровне объекта, уже выбранного view
 
     """
 
@@ -18,13 +19,12 @@ class IsOwnerOrModeratorOrCreate(BasePermission):
             return True
         if not request.user or not request.user.is_authenticated:
             return False
+        return request.user.is_moderator or "pk" in view.kwargs
+
+    def has_object_permission(self, request, view, obj):
         if request.user.is_moderator:
             return True
-        if "pk" in view.kwargs:
-            user = get_object_or_404(User, pk=view.kwargs["pk"])
-            if "is_moderator" not in request.data:
-                return request.user == user
-        return False
+        return "is_moderator" not in request.data and obj.id == request.user.id
 
 
 class IsModeratorOrRead(BasePermission):
@@ -37,6 +37,25 @@ class IsModeratorOrRead(BasePermission):
         )
 
 
+class IsModerator(BasePermission):
+    def has_permission(self, request, view):
+        return bool(
+            request.user and request.user.is_authenticated and request.user.is_moderator
+        )
+
+
+class IsEventAuthor(BasePermission):
+    """
+    Только автор события может работать со списком его участников
+    """
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
+
+    def has_object_permission(self, request, view, obj):
+        return obj.user_id == request.user.id
+
+
 class IsNotModerator(BasePermission):
     def has_permission(self, request, view):
         return bool(
@@ -50,7 +69,8 @@ class PermissionForReview(BasePermission):
     """
     Любой может прочитать отзывы
     Оставить отзыв может только не модератор
-    Изменить можно только свой собственный отзыв
+    Изменить можно только свой собственный отзыв, он проверяется на уровне
+    объекта, уже выбранного view
     """
 
     def has_permission(self, request, view):
@@ -58,7 +78,29 @@ class PermissionForReview(BasePermission):
             return True
         if not request.user or not request.user.is_authenticated:
             return False
-        if "pk" in view.kwargs:
-            review = get_object_or_404(Review, id=view.kwargs["pk"])
-            return request.user == review.author
-        return not request.user.is_moderator
+        return "pk" in view.kwargs or not request.user.is_moderator
+
+    def has_object_permission(self, request, view, obj):
+        if request.method == "GET":
+            return True
+        return obj.author_id == request.user.id
+
+
+class HasMetricsToken(BasePermission):
+    """
+    Доступ сборщика метрик (Prometheus) по заголовку
+    "Authorization: Bearer <METRICS_TOKEN>". Без METRICS_TOKEN метрики
+    недоступны
+    """
+
+    keyword = b"bearer"
+
+    def has_permission(self, request, view):
+        if not settings.METRICS_TOKEN:
+            return False
+        auth = get_authorization_header(request).split()
+        return (
+            len(auth) == 2
+            and auth[0].lower() == self.keyword
+            and constant_time_compare(auth[1], settings.METRICS_TOKEN.encode())
+        )
@@ -0,0 +1,287 @@
+import asyncio
+import cProfile
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from event.cache import LOCAL_CACHES, get_cache
+
+VIEWS_KEY = "profiling:views"
+# имя и описание счетчика, значения в кэше - целые (время - в мкс)
+METRICS = {
+    "requests": ("alente_sampled_requests_total", "Замеренные запросы"),
+    "total": ("alente_request_seconds_total", "Время запросов"),
+    "db": ("alente_db_seconds_total", "Время запросов к БД"),
+    "queries": ("alente_db_queries_total", "Запросы к БД"),
+    "duplicates": (
+        "alente_db_duplicate_queries_total",
+        "Повторные запросы к БД с теми же параметрами",
+    ),
+    "similar": (
+        "alente_db_similar_queries_total",
+        "Повторные запросы к БД с другими параметрами (N+1)",
+    ),
+    "serializer": ("alente_serializer_seconds_total", "Время сериализации"),
+    "template": ("alente_template_seconds_total", "Время рендеринга шаблонов"),
+}
+TIMINGS = ("total", "db", "serializer", "template")
+FILENAME_UNSAFE = re.compile(r"[^\w-]")
+
+current_profile = ContextVar("current_profile", default=None)
+
+
+def is_sampled():
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def record_query(execute, sql, params, many, context):
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.timings["db"] += time.perf_counter() - started
+        profile.add_query(sql, params)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed(name):
+    """
+    Время блока учитывается в метрике name текущего замера. Вложенные
+    блоки с тем же именем не учитываются повторно
+    """
+    profile = current_profile.get()
+    if profile is None or name in profile.active:
+        yield
+        return
+    profile.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.timings[name] += time.perf_counter() - started
+        profile.active.discard(name)
+
+
+class Profile:
+    """
+    Замер запроса или блока кода: общее время, время и кол-во запросов к
+    БД (в т.ч. повторных), время сериализации и рендеринга шаблонов
+    """
+
+    def __init__(self):
+        self.timings = dict.fromkeys(TIMINGS, 0.0)
+        self.queries = self.duplicates = self.similar = 0
+        self.statements = set()
+        self.sql = set()
+        self.active = set()
+        self.profiler = None
+
+    def add_query(self, sql, params):
+        self.queries += 1
+        statement = (sql, repr(params))
+        if statement in self.statements:
+            self.duplicates += 1
+        elif sql in self.sql:
+            self.similar += 1
+        self.statements.add(statement)
+        self.sql.add(sql)
+
+    def start(self):
+        # под ASGI представление выполняется в потоке пула async_view со
+        # своими соединениями, они подключаются к замеру при создании
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all():
+            install_query_recorder(connection)
+        self.token = current_profile.set(self)
+        if settings.PROFILING_DUMP_DIR:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.timings["total"] = time.perf_counter() - self.started
+        if self.profiler is not None:
+            self.profiler.disable()
+        current_profile.reset(self.token)
+
+    def save(self, name):
+        """
+        Добавляет замер к метрикам name в кэше, общем для всех процессов.
+        Профиль медленного замера сохраняется в PROFILING_DUMP_DIR
+        """
+        cache = get_cache()
+        views = cache.get(VIEWS_KEY, [])
+        if name not in views:
+            cache.set(VIEWS_KEY, [*views, name], None)
+        values = {
+            "requests": 1,
+            "queries": self.queries,
+            "duplicates": self.duplicates,
+            "similar": self.similar,
+        }
+        for timing in TIMINGS:
+            values[timing] = int(self.timings[timing] * 1_000_000)
+        for metric, value in values.items():
+            key = f"profiling:{name}:{metric}"
+            cache.add(key, 0, None)
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                # ключ вытеснен из кэша между add и incr
+                pass
+        if (
+            self.profiler is not None
+            and self.timings["total"] * 1000 >= settings.PROFILING_SLOW_THRESHOLD
+        ):
+            os.makedirs(settings.PROFILING_DUMP_DIR, exist_ok=True)
+            filename = f"{time.time():.3f}_{FILENAME_UNSAFE.sub('_', name)}.prof"
+            self.profiler.dump_stats(
+                os.path.join(settings.PROFILING_DUMP_DIR, filename)
+            )
+
+    def server_timing(self):
+        return ", ".join(
+            [
+                f"total;dur={self.timings['total'] * 1000:.1f}",
+                f'db;dur={self.timings["db"] * 1000:.1f};desc="{self.queries} '
+                f'queries, {self.duplicates} duplicate, {self.similar} similar"',
+                f"serializer;dur={self.timings['serializer'] * 1000:.1f}",
+                f"template;dur={self.timings['template'] * 1000:.1f}",
+            ]
+        )
+
+
+@contextmanager
+def profiled(name):
+    """
+    Замер блока кода вне запроса (например, отправки уведомлений) с той
+    же выборкой, что и запросы
+    """
+    if not settings.PROFILING_ENABLED or not is_sampled():
+        yield None
+        return
+    profile = Profile()
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        profile.save(name)
+
+
+class ProfilingMiddleware:
+    """
+    Замер доли PROFILING_SAMPLE_RATE запросов: результат отдается в
+    заголовке Server-Timing и суммируется в метриках /api/v1/metrics/ по
+    имени представления. Отключен, если PROFILING_ENABLED не задан.
+    Метрики хранятся в кэше событий, он должен быть общим для процессов.
+    Под ASGI работает асинхронно: иначе Django выполнял бы каждый запрос в
+    своем единственном синхронном потоке, по одному
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        if isinstance(get_cache(), LOCAL_CACHES):
+            raise ImproperlyConfigured(
+                "PROFILING_ENABLED требует кэш, общий для процессов (CACHE_URL): "
+                "иначе у каждого воркера свои метрики"
+            )
+        # постоянные соединения потоков async_view создаются до замера
+        connection_created.connect(install_query_recorder)
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # как в django.utils.deprecation.MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not is_sampled():
+            return self.get_response(request)
+        profile = Profile()
+        profile.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+        profile.save(get_view_name(request))
+        response["Server-Timing"] = profile.server_timing()
+        return response
+
+    async def __acall__(self, request):
+        if not is_sampled():
+            return await self.get_response(request)
+        profile = Profile()
+        profile.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.stop()
+        # кэш метрик синхронный, запись в него не блокирует event loop
+        await sync_to_async(profile.save, thread_sensitive=False)(
+            get_view_name(request)
+        )
+        response["Server-Timing"] = profile.server_timing()
+        return response
+
+
+def get_view_name(request):
+    match = request.resolver_match
+    return match.view_name if match else "unknown"
+
+
+class ProfiledSerializerMixin:
+    """
+    Время to_representation учитывается в метрике serializer
+    """
+
+    def to_representation(self, instance):
+        if current_profile.get() is None:
+            return super().to_representation(instance)
+        with timed("serializer"):
+            return super().to_representation(instance)
+
+
+def get_metrics():
+    """
+    Метрики в текстовом формате Prometheus
+    """
+    cache = get_cache()
+    views = cache.get(VIEWS_KEY, [])
+    values = cache.get_many(
+        [f"profiling:{view}:{metric}" for view in views for metric in METRICS]
+    )
+    lines = [
+        "# HELP alente_profiling_sample_rate Доля замеряемых запросов",
+        "# TYPE alente_profiling_sample_rate gauge",
+        f"alente_profiling_sample_rate {settings.PROFILING_SAMPLE_RATE}",
+    ]
+    for metric, (name, description) in METRICS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for view in views:
+            value = values.get(f"profiling:{view}:{metric}", 0)
+            if metric in TIMINGS:
+                value /= 1_000_000
+            lines.append(f'{name}{{view="{view}"}} {value}')
+    return "\n".join(lines) + "\n"
@@ -1,15 +1,21 @@
 from datetime import datetime
 
-from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 
-from event.models import Event, EventParticipant, Review
+from event.models import Event, EventParticipant, Review, ReviewUpload
+from event.profiling import ProfiledSerializerMixin
+from event.uploads import validate_review_file
 
 User = get_user_model()
 
+PARTICIPANT_FIELDS = ("id", "username", "email", "is_moderator")
+BULK_REGISTRATION_MAX_SIZE = 1000
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(max_length=128, min_length=8, write_only=True)
 
     class Meta:
@@ -23,14 +29,42 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class EventSerializer(serializers.ModelSerializer):
+class LoginSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    password = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        user = authenticate(
+            request=self.context.get("request"),
+            username=attrs["username"],
+            password=attrs["password"],
+        )
+        if user is None:
+            raise serializers.ValidationError("Неверное имя пользователя или пароль")
+        attrs["user"] = user
+        return attrs
+
+
+class EventSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = "__all__"
         read_only_fields = ["user"]
 
 
-class EventModeratorSerializer(serializers.ModelSerializer):
+class EventImportSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text="CSV или NDJSON (.csv, .ndjson, .jsonl)")
+
+
+def get_participants(event):
+    return (
+        User.objects.filter(event_participants__event=event)
+        .only(*PARTICIPANT_FIELDS)
+        .order_by("id")
+    )
+
+
+class EventModeratorSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
 
     participant = serializers.SerializerMethodField()
 
@@ -40,17 +74,41 @@ class EventModeratorSerializer(serializers.ModelSerializer):
         read_only_fields = ["user"]
 
     def get_participant(self, obj):
-        users_id = obj.event_participants.values_list("user", flat=True)
-        users = User.objects.filter(id__in=users_id)
+        """
+        Первые EVENT_PARTICIPANTS_PREVIEW_SIZE участников одним запросом,
+        полный список - /event/{id}/participants/ с пагинацией
+        """
+        users = get_participants(obj)[: settings.EVENT_PARTICIPANTS_PREVIEW_SIZE]
         return UserSerializer(users, many=True).data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class BulkRegistrationSerializer(serializers.Serializer):
+    events = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_REGISTRATION_MAX_SIZE,
+    )
+
+
+class BulkParticipantsSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_REGISTRATION_MAX_SIZE,
+    )
+
+
+class ReviewSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = "__all__"
         read_only_fields = ["author", "event"]
 
+    def validate_file(self, value):
+        if value:
+            validate_review_file(value.name, value.size)
+        return value
+
     def validate(self, data):
         if self.context["request"].method != "POST":
             return data
@@ -69,3 +127,24 @@ class ReviewSerializer(serializers.ModelSerializer):
                 "Мероприятие еще не состоялось, рано оставлять отзыв"
             )
         return data
+
+
+class ReviewUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReviewUpload
+        fields = (
+            "id",
+            "filename",
+            "content_type",
+            "size",
+            "offset",
+            "status",
+            "checksum",
+            "thumbnail",
+            "error",
+        )
+        read_only_fields = ("offset", "status", "checksum", "thumbnail", "error")
+
+    def validate(self, data):
+        validate_review_file(data["filename"], data["size"])
+        return data
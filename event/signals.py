@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from event.cache import invalidate_event_cache
+from event.db import check_connections, mark_connections_used
+from event.models import Event, Review, ReviewUpload
+from event.uploads import release_review_file
+from event.utils import recompute_review_stats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_cache_on_change(sender, **kwargs):
+    invalidate_event_cache()
+
+
+@receiver(post_delete, sender=Review)
+def release_review_file_on_delete(sender, instance, **kwargs):
+    release_review_file(instance.file.name)
+
+
+@receiver(post_delete, sender=ReviewUpload)
+def release_thumbnail_on_delete(sender, instance, **kwargs):
+    release_review_file(instance.thumbnail.name)
+
+
+@receiver(pre_delete, sender=User)
+def release_seats_on_user_delete(sender, instance, **kwargs):
+    """
+    Заявки и отзывы пользователя удаляются каскадом, минуя API: места на
+    его событиях освобождаются в той же транзакции, статистика отзывов
+    пересчитывается после ее завершения
+    """
+    Event.objects.filter(event_participants__user=instance).update(
+        participants_count=Greatest(F("participants_count") - 1, 0)
+    )
+    reviewed = list(
+        Review.objects.filter(author=instance).values_list("event_id", flat=True)
+    )
+    if reviewed:
+        transaction.on_commit(
+            lambda: recompute_review_stats(Event.objects.filter(id__in=reviewed))
+        )
+    invalidate_event_cache()
+
+
+request_started.connect(check_connections)
+request_finished.connect(mark_connections_used)
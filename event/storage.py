@@ -0,0 +1,107 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла - SHA-256 его содержимого:
+    <каталог upload_to>/<первые 2 символа хэша>/<хэш><расширение>.
+    Одинаковые файлы хранятся один раз, повторная загрузка известного файла
+    не записывает его заново. Файл может использоваться несколькими
+    записями, удалять его можно только когда ссылок не осталось
+    (event.uploads.release_review_file).
+    По умолчанию файлы лежат в REVIEW_MEDIA_ROOT, а не в публичном
+    MEDIA_ROOT, и ссылки на них ведут на REVIEW_MEDIA_URL
+    """
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.REVIEW_MEDIA_ROOT)
+
+    @cached_property
+    def base_url(self):
+        if self._base_url is not None and not self._base_url.endswith("/"):
+            self._base_url += "/"
+        return self._value_or_setting(self._base_url, settings.REVIEW_MEDIA_URL)
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == "REVIEW_MEDIA_ROOT":
+            self.__dict__.pop("base_location", None)
+            self.__dict__.pop("location", None)
+        elif setting == "REVIEW_MEDIA_URL":
+            self.__dict__.pop("base_url", None)
+
+    def get_content_name(self, name, checksum):
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return posixpath.join(directory, checksum[:2], f"{checksum}{extension}")
+
+    def get_available_name(self, name, max_length=None):
+        # имя определяется содержимым в _save, совпадение имен не конфликт
+        return name
+
+    def _save(self, name, content):
+        directory = self.path(posixpath.dirname(name))
+        os.makedirs(directory, exist_ok=True)
+        checksum = hashlib.sha256()
+        # хэш считается при записи во временный файл, без повторного чтения
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as temp:
+            for chunk in content.chunks():
+                checksum.update(chunk)
+                temp.write(chunk)
+        name = self.get_content_name(name, checksum.hexdigest())
+        if self.touch(name):
+            os.remove(temp.name)
+            return name
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp.name, path)
+        # временный файл создается с правами 0600, а файл должен читать nginx
+        os.chmod(path, self.file_permissions_mode or 0o644)
+        return name
+
+    def touch(self, name):
+        """
+        Отмечает повторное использование файла временем изменения, чтобы
+        параллельный release его не удалил. False - файла нет
+        """
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, name, delay):
+        """
+        Удаляет файл, если его не использовали последние delay секунд.
+        Файл сначала атомарно переименовывается: touch после этого не найдет
+        файл и загрузка запишет его заново, а touch до переименования виден
+        по времени изменения - тогда файл возвращается на место.
+        Возвращает True, если файл удален
+        """
+        path = self.path(name)
+        released = f"{path}.{uuid.uuid4().hex}.released"
+        try:
+            os.rename(path, released)
+        except FileNotFoundError:
+            return False
+        if time.time() - os.stat(released).st_mtime < delay:
+            # содержимое то же, можно заменить копию, записанную заново
+            os.replace(released, path)
+            return False
+        os.remove(released)
+        return True
+
+
+review_storage = ContentAddressedStorage()
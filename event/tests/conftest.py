@@ -1,9 +1,12 @@
+import json
+import os
 import shutil
 import tempfile
 
 import pytest
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient
 
@@ -25,10 +28,32 @@ EMAIL = "test_email@test.com"
 PASSWORD = "pass"
 
 
+def pytest_terminal_summary(terminalreporter, config):
+    """Выводит результаты замеров tests_benchmarks.py."""
+    results = getattr(config, "benchmark_results", None)
+    if not results:
+        return
+    if os.environ.get("BENCHMARK_JSON"):
+        with open(os.environ["BENCHMARK_JSON"], "w") as file:
+            json.dump(results, file, indent=2)
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'эндпоинт':<20}{'запросов':>10}{'p50, мс':>10}{'p99, мс':>10}"
+        f"{'память, КБ':>12}"
+    )
+    for result in results:
+        terminalreporter.write_line(
+            f"{result['name']:<20}{result['queries']:>10}{result['p50']:>10.1f}"
+            f"{result['p99']:>10.1f}{result['memory']:>12}"
+        )
+
+
 @pytest.fixture(scope="session", autouse=True)
 def override_setting_media_root():
     """Переопределяет settings media root."""
     settings.MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+    settings.REVIEW_UPLOAD_TEMP_DIR = os.path.join(settings.MEDIA_ROOT, "uploads")
+    settings.REVIEW_MEDIA_ROOT = os.path.join(settings.MEDIA_ROOT, "protected")
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -41,6 +66,12 @@ def cleanup(request):
     request.addfinalizer(remove_test_dir)
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Очищает кэш между тестами."""
+    cache.clear()
+
+
 @pytest.fixture
 def image():
     return SimpleUploadedFile(
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+from django.urls import resolve, reverse
+
+from event.asgi import ASGIHandler, iterate_streaming
+from event.async_views import async_view
+from event.views import UserEventsView
+
+EXPORT_URLS = ("event-export-participants", "event-export-reviews")
+
+pytestmark = pytest.mark.django_db
+
+
+async def download(client, url):
+    """
+    Потоковый ответ читается в event loop, как его отдает ASGI-сервер
+    """
+    response = await client.get(url)
+    assert response.status_code == 200
+    return b"".join([block async for block in iterate_streaming(response)])
+
+
+async def call_application(url, cookies):
+    """
+    Запрос к ASGI-приложению проекта, возвращает отправленные сообщения
+    """
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": url,
+        "query_string": b"",
+        "headers": [(b"cookie", cookies.output(header="", sep=";").encode())],
+    }
+    await ASGIHandler()(scope, receive, send)
+    return messages
+
+
+class TestAsyncViews:
+    @pytest.mark.parametrize(
+        "url",
+        [
+            reverse("event-list"),
+            reverse("event-detail", args=[1]),
+            reverse("reviews-list", args=[1]),
+            reverse("my_events"),
+        ],
+    )
+    def test_hot_read_views_are_async(self, url):
+        """
+        Список и карточка события, список отзывов и my_events обслуживаются
+        асинхронными представлениями
+        """
+        assert asyncio.iscoroutinefunction(resolve(url).func), (
+            f"Проверьте, что {url} обслуживается асинхронным представлением"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_async_event_list(self, event):
+        """
+        Список событий отдается под ASGI
+        """
+        response = asyncio.run(AsyncClient().get(reverse("event-list")))
+        assert response.status_code == 200
+        assert [item["id"] for item in response.data["results"]] == [event.id]
+
+    def test_sync_view_without_async_views(self, settings):
+        """
+        Без ASYNC_VIEWS (WSGI) представление не оборачивается
+        """
+        settings.ASYNC_VIEWS = False
+        view = UserEventsView.as_view()
+        assert async_view(view) is view
+
+    @pytest.mark.django_db(transaction=True)
+    def test_async_view_reuses_connection(self, event, monkeypatch):
+        """
+        Под ASGI соединение потока пула переиспользуется между запросами
+        (DB_CONN_MAX_AGE), а не открывается заново на каждый запрос
+        """
+        monkeypatch.setitem(connections.databases["default"], "CONN_MAX_AGE", 60)
+        created = []
+
+        def count(sender, connection, **kwargs):
+            created.append(connection)
+
+        connection_created.connect(count)
+        try:
+            for _ in range(3):
+                response = asyncio.run(AsyncClient().get(reverse("event-list")))
+                assert response.status_code == 200
+        finally:
+            connection_created.disconnect(count)
+            monkeypatch.undo()
+            # соединение потока пула закрывается после запроса без CONN_MAX_AGE
+            asyncio.run(AsyncClient().get(reverse("event-list")))
+        assert len(created) <= 1, (
+            "Проверьте, что под ASGI соединение с БД не открывается заново "
+            "на каждый запрос"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize("url", EXPORT_URLS)
+    def test_async_export(
+        self, moderator_user, event, event_participant, review, url
+    ):
+        """
+        Выгрузки отдаются под ASGI: строки выбираются из БД не в event loop
+        """
+        client = AsyncClient()
+        client.force_login(moderator_user)
+        content = asyncio.run(download(client, reverse(url, args=[event.id])))
+        assert content.decode().count("\n") == 2, (
+            f"Проверьте, что {url} отдается под ASGI"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_asgi_application_streaming(
+        self, client, moderator_user, event, event_participant
+    ):
+        """
+        ASGI-приложение проекта отправляет потоковый ответ по частям,
+        завершающее сообщение - последнее
+        """
+        client.force_login(moderator_user)
+        url = reverse(EXPORT_URLS[0], args=[event.id])
+        messages = asyncio.run(call_application(url, client.cookies))
+        assert messages[0]["status"] == 200
+        body = b"".join(message.get("body", b"") for message in messages[1:])
+        assert event_participant.user.username.encode() in body
+        assert messages[-1] == {"type": "http.response.body"}
@@ -0,0 +1,212 @@
+import os
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from event.generator import generate_data
+from event.models import Event, EventParticipant
+
+User = get_user_model()
+
+# BENCHMARK_SCALE=1 - 100 000 событий, 1 000 000 заявок, 200 000 отзывов
+SCALE = float(os.environ.get("BENCHMARK_SCALE", "0.001"))
+ROUNDS = int(os.environ.get("BENCHMARK_ROUNDS", "20"))
+# множитель бюджетов задержки для медленных машин CI
+LATENCY_FACTOR = float(os.environ.get("BENCHMARK_LATENCY_FACTOR", "1"))
+# вне транзакции теста atomic() не выполняет запросов SAVEPOINT
+SAVEPOINT_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+def scaled(count):
+    return max(int(count * SCALE), 10)
+
+
+@pytest.fixture(scope="module")
+def benchmark_data(django_db_setup, django_db_blocker):
+    """
+    Данные для замеров создаются один раз на модуль в транзакции, которая
+    откатывается после модуля, и не видны другим тестам
+    """
+    with django_db_blocker.unblock(), transaction.atomic():
+        generate_data(
+            users=scaled(100_000),
+            events=scaled(100_000),
+            participants=scaled(1_000_000),
+            reviews=scaled(200_000),
+        )
+        now = timezone.now()
+        hot_event = Event.objects.order_by("-participants_count", "id").first()
+        future_event = Event.objects.filter(start_at__gt=now).order_by("id").first()
+        past_events = list(
+            Event.objects.filter(start_at__lt=now)
+            .order_by("id")
+            .values_list("id", flat=True)[: ROUNDS + 2]
+        )
+        # отзывы bench_user оставляет на прошедшие события, где он участник
+        user = User.objects.create(username="bench_user", email="user@bench.ru")
+        EventParticipant.objects.bulk_create(
+            EventParticipant(user=user, event_id=event_id) for event_id in past_events
+        )
+        Event.objects.filter(id__in=past_events).update(
+            participants_count=F("participants_count") + 1
+        )
+        yield {
+            "moderator": hot_event.user,
+            "user": user,
+            "hot_event": hot_event.id,
+            "future_event": future_event.id,
+            "past_events": past_events,
+        }
+        transaction.set_rollback(True)
+
+
+@pytest.fixture(scope="module")
+def benchmark_results(request):
+    results = []
+    request.config.benchmark_results = results
+    return results
+
+
+def client_for(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user=user)
+    return client
+
+
+def event_list(data, number):
+    return client_for().get(reverse("event-list"))
+
+
+def event_detail(data, number):
+    url = reverse("event-detail", args=[data["hot_event"]])
+    return client_for(data["moderator"]).get(url)
+
+
+def event_create(data, number):
+    return client_for(data["moderator"]).post(
+        reverse("event-list"),
+        {
+            "title": f"new{number}",
+            "type": "LOCAL",
+            "address": "address",
+            "description": "description",
+            "start_at": (timezone.now() + timedelta(days=30)).isoformat(),
+        },
+    )
+
+
+def event_participants(data, number):
+    url = reverse("event-participants", args=[data["hot_event"]])
+    return client_for(data["moderator"]).get(url)
+
+
+def registration(data, number):
+    # заявка на будущее событие поочередно создается и удаляется
+    url = reverse("event_registration", args=[data["future_event"]])
+    return client_for(data["user"]).post(url)
+
+
+def my_events(data, number):
+    return client_for(data["user"]).get(reverse("my_events"))
+
+
+def review_list(data, number):
+    return client_for().get(reverse("reviews-list", args=[data["hot_event"]]))
+
+
+def review_create(data, number):
+    url = reverse("reviews-list", args=[data["past_events"][number]])
+    return client_for(data["user"]).post(url, {"text": "text"})
+
+
+# бюджеты: запросов к БД, p99 задержки (мс) и пиковой памяти (КБ) на запрос
+BENCHMARKS = [
+    ("event-list", event_list, 200, 2, 100, 1024),
+    ("event-detail", event_detail, 200, 2, 100, 1024),
+    ("event-create", event_create, 201, 1, 100, 1024),
+    ("event-participants", event_participants, 200, 3, 100, 1024),
+    ("registration", registration, 200, 4, 100, 512),
+    ("my-events", my_events, 200, 2, 100, 1024),
+    ("review-list", review_list, 200, 3, 100, 1024),
+    ("review-create", review_create, 201, 7, 100, 512),
+]
+
+
+@pytest.mark.parametrize(
+    "name, request_func, code, max_queries, max_p99, max_memory", BENCHMARKS
+)
+def test_endpoint_budget(
+    benchmark_data,
+    benchmark_results,
+    name,
+    request_func,
+    code,
+    max_queries,
+    max_p99,
+    max_memory,
+):
+    """
+    Кол-во запросов к БД, задержка и память запроса к эндпоинту не
+    превышают бюджета. Кэш событий очищается перед каждым запросом
+    """
+    latencies, queries = [], []
+    for number in range(ROUNDS + 1):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = request_func(benchmark_data, number)
+            elapsed = time.perf_counter() - started
+        assert response.status_code == code, (
+            f"Проверьте, что {name} возвращает статус {code}: {response.data}"
+        )
+        # первый запрос - прогрев
+        if number:
+            latencies.append(elapsed * 1000)
+            queries.append(
+                sum(
+                    not query["sql"].startswith(SAVEPOINT_PREFIXES)
+                    for query in context.captured_queries
+                )
+            )
+    cache.clear()
+    tracemalloc.start()
+    try:
+        request_func(benchmark_data, ROUNDS + 1)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    latencies.sort()
+    result = {
+        "name": name,
+        "queries": max(queries),
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)],
+        "memory": peak // 1024,
+    }
+    benchmark_results.append(result)
+    assert result["queries"] <= max_queries, (
+        f"Проверьте, что {name} выполняет не более {max_queries} запросов "
+        f"к БД, а не {result['queries']}"
+    )
+    assert result["p99"] <= max_p99 * LATENCY_FACTOR, (
+        f"Проверьте, что p99 задержки {name} ({result['p99']:.1f} мс) "
+        f"не превышает {max_p99 * LATENCY_FACTOR:.0f} мс"
+    )
+    assert result["memory"] <= max_memory, (
+        f"Проверьте, что {name} выделяет не более {max_memory} КБ, "
+        f"а не {result['memory']} КБ"
+    )
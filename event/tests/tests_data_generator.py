@@ -0,0 +1,78 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+
+from event.generator import generate_data
+from event.models import Event, EventParticipant, Review
+from event.utils import get_inconsistent_review_stats
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+def get_rows():
+    """
+    Созданные строки с номерами пользователей и событий относительно первых
+    """
+    first_user = User.objects.order_by("id").values_list("id", flat=True)[0]
+    first_event = Event.objects.order_by("id").values_list("id", flat=True)[0]
+    participants = EventParticipant.objects.order_by("id").values_list(
+        "user_id", "event_id"
+    )
+    reviews = Review.objects.order_by("id").values_list("author_id", "event_id")
+    return [
+        [(user - first_user, event - first_event) for user, event in rows]
+        for rows in (participants, reviews)
+    ]
+
+
+class TestDataGenerator:
+    def test_generate_data(self):
+        """
+        Создается запрошенное кол-во строк, счетчики событий согласованы
+        """
+        created = generate_data(users=200, events=50, participants=1000, reviews=100)
+        assert created == {
+            "users": 201,
+            "events": 50,
+            "participants": 1000,
+            "reviews": 100,
+        }
+        assert EventParticipant.objects.count() == 1000
+        assert Review.objects.count() == 100
+        assert not Event.objects.annotate(
+            count=Count("event_participants")
+        ).exclude(count=F("participants_count")), (
+            "Проверьте, что participants_count совпадает с кол-вом заявок"
+        )
+        assert not get_inconsistent_review_stats()
+        assert not Review.objects.exclude(
+            author__event_participants__event=F("event")
+        ), "Проверьте, что отзывы оставляют участники события"
+        assert not EventParticipant.objects.filter(user__is_moderator=True)
+
+    def test_hot_events(self):
+        """
+        Несколько событий собирают значительную часть заявок
+        """
+        generate_data(users=1000, events=100, participants=5000, reviews=0)
+        counts = list(
+            Event.objects.order_by("-participants_count").values_list(
+                "participants_count", flat=True
+            )
+        )
+        assert sum(counts[:10]) >= 5000 * 0.3
+
+    def test_same_seed_same_data(self):
+        """
+        При одинаковом seed создаются одни и те же данные
+        """
+        generate_data(users=100, events=20, participants=300, reviews=50, seed=1)
+        rows = get_rows()
+        Review.objects.all().delete()
+        EventParticipant.objects.all().delete()
+        Event.objects.all().delete()
+        User.objects.all().delete()
+        generate_data(users=100, events=20, participants=300, reviews=50, seed=1)
+        assert get_rows() == rows
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+from django.db import connection
+
+from event.db import check_connections, mark_connections_used
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def idle_connection(settings, monkeypatch):
+    settings.DB_HEALTH_CHECK_INTERVAL = 30
+    connection.ensure_connection()
+    closed = []
+    # закрытие соединения прервало бы транзакцию теста
+    monkeypatch.setattr(connection, "close", lambda: closed.append(True))
+    monkeypatch.setattr(
+        connection, "last_used_at", time.monotonic() - 60, raising=False
+    )
+    return closed
+
+
+class TestConnectionHealthCheck:
+    def test_mark_connections_used(self, monkeypatch):
+        """
+        По окончании запроса запоминается время использования соединения
+        """
+        connection.ensure_connection()
+        monkeypatch.setattr(connection, "last_used_at", None, raising=False)
+        mark_connections_used()
+        assert connection.last_used_at is not None
+
+    @pytest.mark.parametrize("usable, closed", [(True, []), (False, [True])])
+    def test_idle_connection_checked(
+        self, idle_connection, monkeypatch, usable, closed
+    ):
+        """
+        Простаивавшее соединение проверяется, неработающее закрывается
+        """
+        monkeypatch.setattr(connection, "is_usable", lambda: usable)
+        check_connections()
+        assert idle_connection == closed, (
+            "Проверьте, что неработающее соединение закрывается перед запросом"
+        )
+
+    def test_recent_connection_not_checked(self, idle_connection, monkeypatch):
+        """
+        Недавно использованное соединение не проверяется запросом к БД
+        """
+        connection.last_used_at = time.monotonic()
+        monkeypatch.setattr(connection, "is_usable", pytest.fail)
+        check_connections()
+        assert idle_connection == []
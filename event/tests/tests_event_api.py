@@ -1,10 +1,16 @@
 import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from event.models import Event
+from event.models import Event, EventParticipant
 
 EVENT_LIST_URL = reverse("event-list")
 EVENT_DETAIL_URL = "event-detail"
+EVENT_PARTICIPANTS_URL = "event-participants"
+
+User = get_user_model()
 
 pytestmark = pytest.mark.django_db
 
@@ -125,3 +131,84 @@ class TestEventAPI:
         assert response.status_code == code, (
             f"Проверьте, что при DELETE запросе {url} " f"возвращается статус {code}"
         )
+
+    @pytest.mark.parametrize(
+        "user_client, code",
+        [
+            (pytest.lazy_fixture("moderator_client"), 200),
+            (pytest.lazy_fixture("not_moderator_client"), 403),
+            (pytest.lazy_fixture("guest_client"), 403),
+        ],
+    )
+    def test_get_event_participants_url(
+        self, user_client, code, event, event_participant
+    ):
+        """
+        Только автор события может получить список участников события
+        """
+        url = reverse(EVENT_PARTICIPANTS_URL, args=[event.id])
+        response = user_client.get(url)
+        assert response.status_code == code, (
+            f"Проверьте, что при GET запросе {url} " f"возвращается статус {code}"
+        )
+
+    def test_event_participants_bounded(
+        self, moderator_client, event, settings, django_assert_max_num_queries
+    ):
+        """
+        Детальная информация о событии содержит ограниченный список
+        участников и строится фиксированным кол-вом запросов
+        """
+        settings.EVENT_PARTICIPANTS_PREVIEW_SIZE = 5
+        User.objects.bulk_create(
+            User(username=f"participant{number}", email=f"p{number}@test.com")
+            for number in range(30)
+        )
+        users = User.objects.filter(username__startswith="participant")
+        EventParticipant.objects.bulk_create(
+            EventParticipant(event=event, user=user) for user in users
+        )
+        url = reverse(EVENT_DETAIL_URL, args=[event.id])
+        with django_assert_max_num_queries(4):
+            response = moderator_client.get(url)
+        assert len(response.data["participant"]) == 5, (
+            f"Проверьте, что при GET запросе {url} " f"список участников ограничен"
+        )
+        url = reverse(EVENT_PARTICIPANTS_URL, args=[event.id])
+        response = moderator_client.get(url)
+        assert response.data["count"] == 30, (
+            f"Проверьте, что при GET запросе {url} "
+            f"возвращается правильное кол-во объектов"
+        )
+
+    @pytest.mark.parametrize(
+        "user_client, method",
+        [
+            (pytest.lazy_fixture("moderator_client"), "get"),
+            (pytest.lazy_fixture("moderator_client"), "patch"),
+            (pytest.lazy_fixture("not_moderator_client"), "get"),
+            (pytest.lazy_fixture("guest_client"), "get"),
+        ],
+    )
+    def test_event_detail_single_event_query(self, user_client, method, event):
+        """
+        Детальный запрос события выполняет ровно один запрос к таблице
+        событий
+        """
+        url = reverse(EVENT_DETAIL_URL, args=[event.id])
+        with CaptureQueriesContext(connection) as context:
+            if method == "get":
+                response = user_client.get(url)
+            else:
+                response = user_client.patch(url, data={"address": "address2"})
+        assert response.status_code == 200
+        event_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "event_event"' in query["sql"]
+        ]
+        assert len(event_queries) == 1, (
+            f"Проверьте, что при {method.upper()} запросе {url} событие "
+            f"запрашивается из БД ровно один раз"
+        )
@@ -0,0 +1,189 @@
+import time
+
+import pytest
+from django.urls import reverse
+from django.utils.http import http_date
+
+from event.cache import invalidate_event_cache
+from event.models import Event
+from event.utils import recompute_participants_count
+
+EVENT_LIST_URL = reverse("event-list")
+EVENT_DETAIL_URL = "event-detail"
+EVENT_REGISTRATION_URL = "event_registration"
+EVENT_CACHE_STATS_URL = reverse("event_cache_stats")
+
+pytestmark = pytest.mark.django_db
+
+
+class TestEventCache:
+    def test_event_list_cached(self, guest_client, event, django_assert_num_queries):
+        """
+        Повторный запрос списка событий отдается из кэша без запросов к БД
+        """
+        response = guest_client.get(EVENT_LIST_URL)
+        assert response["X-Cache"] == "MISS"
+        with django_assert_num_queries(0):
+            response = guest_client.get(EVENT_LIST_URL)
+        assert response["X-Cache"] == "HIT", (
+            f"Проверьте, что повторный GET запрос {EVENT_LIST_URL} отдается из кэша"
+        )
+        assert response.data["results"][0]["id"] == event.id
+
+    def test_event_cache_invalidated(
+        self, guest_client, moderator_client, not_moderator_client, event
+    ):
+        """
+        Изменение события и заявка на участие сбрасывают кэш
+        """
+        url = reverse(EVENT_DETAIL_URL, args=[event.id])
+        guest_client.get(url)
+        moderator_client.patch(url, data={"title": "new title"})
+        response = guest_client.get(url)
+        assert response["X-Cache"] == "MISS"
+        assert response.data["title"] == "new title"
+        not_moderator_client.post(reverse(EVENT_REGISTRATION_URL, args=[event.id]))
+        response = guest_client.get(url)
+        assert response["X-Cache"] == "MISS"
+        assert response.data["participants_count"] == 1
+
+    def test_event_cache_invalidated_per_event(
+        self, guest_client, not_moderator_client, event, event_2, settings
+    ):
+        """
+        Заявка сбрасывает кэш только карточки своего события, список
+        обновляется не позже чем через EVENT_LIST_CACHE_TIMEOUT
+        """
+        settings.EVENT_LIST_CACHE_TIMEOUT = 3600
+        other_url = reverse(EVENT_DETAIL_URL, args=[event_2.id])
+        guest_client.get(EVENT_LIST_URL)
+        guest_client.get(other_url)
+        not_moderator_client.post(reverse(EVENT_REGISTRATION_URL, args=[event.id]))
+        response = guest_client.get(other_url)
+        assert response["X-Cache"] == "HIT", (
+            "Проверьте, что заявка не сбрасывает кэш других событий"
+        )
+        response = guest_client.get(EVENT_LIST_URL)
+        assert response["X-Cache"] == "HIT"
+        settings.EVENT_LIST_CACHE_TIMEOUT = 1
+        time.sleep(1)
+        response = guest_client.get(EVENT_LIST_URL)
+        assert response["X-Cache"] == "MISS", (
+            "Проверьте, что список обновляется через EVENT_LIST_CACHE_TIMEOUT"
+        )
+
+    def test_event_last_modified_same_second(self, guest_client, event, monkeypatch):
+        """
+        Пока не закончилась секунда изменения, Last-Modified не отдается:
+        второе изменение в ту же секунду не приводит к устаревшему 304
+        """
+        base = int(time.time()) + 1
+        clock = [base + 0.2]
+        monkeypatch.setattr(time, "time", lambda: clock[0])
+        url = reverse(EVENT_DETAIL_URL, args=[event.id])
+        invalidate_event_cache([event.id])
+        clock[0] = base + 0.3
+        response = guest_client.get(url)
+        assert not response.has_header("Last-Modified")
+        clock[0] = base + 0.7
+        invalidate_event_cache([event.id])
+        clock[0] = base + 0.8
+        response = guest_client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(base))
+        assert response.status_code == 200, (
+            "Проверьте, что изменение в ту же секунду не дает ответа 304"
+        )
+        clock[0] = base + 1.5
+        response = guest_client.get(url)
+        assert response["Last-Modified"] == http_date(base)
+        response = guest_client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(base))
+        assert response.status_code == 304
+
+    def test_event_not_modified(self, guest_client, event):
+        """
+        Условный запрос с актуальным ETag возвращает 304
+        """
+        response = guest_client.get(EVENT_LIST_URL)
+        response = guest_client.get(EVENT_LIST_URL, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == 304, (
+            f"Проверьте, что GET запрос {EVENT_LIST_URL} с актуальным ETag "
+            f"возвращает статус 304"
+        )
+
+    def test_event_author_not_cached(self, guest_client, moderator_client, event):
+        """
+        Автор события получает некэшированный ответ со списком участников,
+        а остальные пользователи не получают его ответ
+        """
+        url = reverse(EVENT_DETAIL_URL, args=[event.id])
+        response = moderator_client.get(url)
+        assert "participant" in response.data
+        response = moderator_client.get(url)
+        assert response["X-Cache"] == "MISS"
+        response = guest_client.get(url)
+        assert "participant" not in response.data
+
+    @pytest.mark.parametrize(
+        "user_client, code",
+        [
+            (pytest.lazy_fixture("moderator_client"), 200),
+            (pytest.lazy_fixture("not_moderator_client"), 403),
+            (pytest.lazy_fixture("guest_client"), 403),
+        ],
+    )
+    def test_event_cache_stats_url(self, user_client, code, guest_client, event):
+        """
+        Статистику кэша может получить только модератор
+        """
+        guest_client.get(EVENT_LIST_URL)
+        guest_client.get(EVENT_LIST_URL)
+        response = user_client.get(EVENT_CACHE_STATS_URL)
+        assert response.status_code == code, (
+            f"Проверьте, что при GET запросе {EVENT_CACHE_STATS_URL} "
+            f"возвращается статус {code}"
+        )
+        if code == 200:
+            assert response.data == {"hits": 1, "misses": 1}
+
+    def test_local_cache_not_used(self, guest_client, event, settings):
+        """
+        С кэшем в памяти процесса (locmem) ответы не кэшируются: сброс кэша
+        командой или другим воркером до процесса не дошел бы
+        """
+        settings.EVENT_CACHE_LOCAL = False
+        guest_client.get(EVENT_LIST_URL)
+        response = guest_client.get(EVENT_LIST_URL)
+        assert not response.has_header("X-Cache"), (
+            "Проверьте, что кэш процесса не используется для событий"
+        )
+        assert not response.has_header("ETag")
+
+    def test_shared_cache_used(self, guest_client, event, settings, tmp_path):
+        """
+        Общий для процессов кэш используется и без EVENT_CACHE_LOCAL
+        """
+        settings.EVENT_CACHE_LOCAL = False
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": str(tmp_path / "cache"),
+            }
+        }
+        guest_client.get(EVENT_LIST_URL)
+        response = guest_client.get(EVENT_LIST_URL)
+        assert response["X-Cache"] == "HIT"
+
+    def test_recompute_invalidates_cache(self, guest_client, event):
+        """
+        Пересчет счетчиков (UPDATE без сигналов) сбрасывает кэш событий
+        """
+        url = reverse(EVENT_DETAIL_URL, args=[event.id])
+        Event.objects.filter(id=event.id).update(participants_count=5)
+        guest_client.get(url)
+        guest_client.get(EVENT_LIST_URL)
+        recompute_participants_count()
+        for current in (url, EVENT_LIST_URL):
+            response = guest_client.get(current)
+            assert response["X-Cache"] == "MISS", (
+                f"Проверьте, что после пересчета счетчиков {current} не "
+                f"отдается из кэша"
+            )
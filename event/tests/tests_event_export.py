@@ -0,0 +1,141 @@
+import json
+import tracemalloc
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+
+from event.models import Event, EventParticipant
+
+User = get_user_model()
+
+EXPORT_PARTICIPANTS_URL = "event-export-participants"
+EXPORT_REVIEWS_URL = "event-export-reviews"
+
+pytestmark = pytest.mark.django_db
+
+
+def read_content(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class TestEventExportAPI:
+    @pytest.mark.parametrize(
+        "user_client, code",
+        [
+            (pytest.lazy_fixture("moderator_client"), 200),
+            (pytest.lazy_fixture("not_moderator_client"), 403),
+            (pytest.lazy_fixture("guest_client"), 403),
+        ],
+    )
+    def test_export_participants_url(
+        self, user_client, code, event, event_participant
+    ):
+        """
+        Выгрузить участников события может только его автор
+        """
+        url = reverse(EXPORT_PARTICIPANTS_URL, args=[event.id])
+        response = user_client.get(url)
+        assert response.status_code == code, (
+            f"Проверьте, что при GET запросе {url} возвращается статус {code}"
+        )
+
+    def test_export_participants_csv(
+        self, moderator_client, event, event_participant, not_moderator_user
+    ):
+        """
+        Участники выгружаются в CSV с заголовком
+        """
+        url = reverse(EXPORT_PARTICIPANTS_URL, args=[event.id])
+        response = moderator_client.get(url)
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv"
+        lines = read_content(response).splitlines()
+        assert lines == [
+            "id,username,email,is_moderator",
+            f"{not_moderator_user.id},{not_moderator_user.username},"
+            f"{not_moderator_user.email},False",
+        ]
+
+    def test_export_reviews_ndjson(self, moderator_client, event, review):
+        """
+        Отзывы выгружаются в NDJSON, по одному объекту в строке
+        """
+        url = reverse(EXPORT_REVIEWS_URL, args=[event.id])
+        response = moderator_client.get(url, {"output": "ndjson"})
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in read_content(response).splitlines()]
+        assert [row["id"] for row in rows] == [review.id]
+        assert rows[0]["author_id"] == review.author_id
+
+    def test_export_unknown_output(self, moderator_client, event):
+        """
+        Неизвестный формат выгрузки возвращает 400
+        """
+        url = reverse(EXPORT_PARTICIPANTS_URL, args=[event.id])
+        response = moderator_client.get(url, {"output": "xml"})
+        assert response.status_code == 400
+
+    def test_export_participants_without_server_side_cursors(
+        self, moderator_client, event, settings, monkeypatch
+    ):
+        """
+        За пулером (серверные курсоры отключены) участники выгружаются
+        пачками по id без пропусков и повторов
+        """
+        settings.EXPORT_CHUNK_SIZE = 2
+        monkeypatch.setitem(
+            connection.settings_dict, "DISABLE_SERVER_SIDE_CURSORS", True
+        )
+        User.objects.bulk_create(
+            User(username=f"participant{number}", email=f"p{number}@test.com")
+            for number in range(5)
+        )
+        users = User.objects.filter(username__startswith="participant")
+        EventParticipant.objects.bulk_create(
+            EventParticipant(event=event, user=user) for user in users
+        )
+        url = reverse(EXPORT_PARTICIPANTS_URL, args=[event.id])
+        response = moderator_client.get(url, {"output": "ndjson"})
+        rows = [json.loads(line) for line in read_content(response).splitlines()]
+        assert [row["id"] for row in rows] == sorted(user.id for user in users)
+
+    def test_export_participants_bounded_memory(self, moderator_client, event):
+        """
+        Выгрузка 100 000 участников не держит их всех в памяти
+        """
+        count = 100_000
+        User.objects.bulk_create(
+            (
+                User(username=f"participant{number}", email=f"p{number}@test.com")
+                for number in range(count)
+            ),
+            batch_size=5000,
+        )
+        EventParticipant.objects.bulk_create(
+            (
+                EventParticipant(event=event, user_id=user_id)
+                for user_id in User.objects.filter(
+                    username__startswith="participant"
+                ).values_list("id", flat=True)
+            ),
+            batch_size=5000,
+        )
+        Event.objects.filter(id=event.id).update(participants_count=count)
+        url = reverse(EXPORT_PARTICIPANTS_URL, args=[event.id])
+        tracemalloc.start()
+        try:
+            response = moderator_client.get(url)
+            size = lines = 0
+            for chunk in response.streaming_content:
+                size += len(chunk)
+                lines += 1
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert lines == count + 1
+        assert peak < size / 2, (
+            f"Проверьте, что при GET запросе {url} пиковый расход памяти "
+            f"({peak} байт) меньше объема выгрузки ({size} байт)"
+        )
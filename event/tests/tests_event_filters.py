@@ -0,0 +1,79 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from event.models import Event
+
+EVENT_LIST_URL = reverse("event-list")
+
+pytestmark = pytest.mark.django_db
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="Планы запросов проверяются только на PostgreSQL",
+)
+
+
+class TestEventFilters:
+    @pytest.mark.parametrize(
+        "params, count",
+        [
+            ({"title__startswith": "title"}, 2),
+            ({"title__startswith": "title2"}, 1),
+            ({"title__icontains": "ITLE2"}, 1),
+            ({"address__icontains": "ADDR"}, 2),
+            ({"type": "LOCAL"}, 0),
+            ({"start_at__gte": "2022-01-01T00:00:00Z"}, 1),
+            ({"start_at__lte": "2022-01-01T00:00:00Z"}, 1),
+        ],
+    )
+    def test_event_filters(self, guest_client, event, event_2, params, count):
+        """
+        События фильтруются по префиксу/подстроке названия и адреса,
+        типу и диапазону дат
+        """
+        response = guest_client.get(EVENT_LIST_URL, data=params)
+        assert response.status_code == 200
+        assert response.data["count"] == count, (
+            f"Проверьте, что при GET запросе {EVENT_LIST_URL} с параметрами "
+            f"{params} возвращается правильное кол-во объектов"
+        )
+
+    @postgresql_only
+    @pytest.mark.parametrize(
+        "queryset, index",
+        [
+            (
+                lambda: Event.objects.filter(type="LOCAL").order_by("start_at"),
+                "event_type_start_at_idx",
+            ),
+            (
+                lambda: Event.objects.filter(user_id=1).order_by("start_at"),
+                "event_user_start_at_idx",
+            ),
+            (
+                lambda: Event.objects.filter(title__startswith="tit"),
+                "event_title_prefix_idx",
+            ),
+            (
+                lambda: Event.objects.filter(title__icontains="itl"),
+                "event_title_trgm_idx",
+            ),
+            (
+                lambda: Event.objects.filter(address__icontains="addr"),
+                "event_address_trgm_idx",
+            ),
+            (
+                lambda: Event.objects.filter(start_at__gte="2022-01-01T00:00:00Z"),
+                "event_start_at_idx",
+            ),
+        ],
+    )
+    def test_event_filters_use_indexes(self, event, event_2, queryset, index):
+        """
+        Запросы фильтрации событий используют индексы
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset().explain()
+        assert index in plan, f"Проверьте, что запрос использует {index}:\n{plan}"
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+from event.models import Event
+
+EVENT_IMPORT_URL = reverse("event-bulk-import")
+
+pytestmark = pytest.mark.django_db
+
+CSV_CONTENT = (
+    "title,type,address,description,start_at,capacity\n"
+    "title1,REGIONAL,address,description,3022-12-12T00:00:00Z,10\n"
+    "title2,LOCAL,address,description,3022-12-13T00:00:00Z,\n"
+    "title3,UNKNOWN,address,description,3022-12-14T00:00:00Z,\n"
+    "title4,LOCAL,address,description,2021-12-12T00:00:00Z,\n"
+)
+
+
+class TestEventImportAPI:
+    @pytest.mark.parametrize(
+        "user_client, code",
+        [
+            (pytest.lazy_fixture("moderator_client"), 200),
+            (pytest.lazy_fixture("not_moderator_client"), 403),
+            (pytest.lazy_fixture("guest_client"), 403),
+        ],
+    )
+    def test_import_events_url(self, user_client, code):
+        """
+        Импортировать события может только модератор
+        """
+        file = SimpleUploadedFile("events.csv", CSV_CONTENT.encode())
+        response = user_client.post(
+            EVENT_IMPORT_URL, data={"file": file}, format="multipart"
+        )
+        assert response.status_code == code, (
+            f"Проверьте, что при POST запросе {EVENT_IMPORT_URL} "
+            f"возвращается статус {code}"
+        )
+
+    def test_import_events_csv(self, moderator_client, moderator_user):
+        """
+        Корректные строки импортируются, ошибочные возвращаются с номером
+        строки и не прерывают импорт
+        """
+        file = SimpleUploadedFile("events.csv", CSV_CONTENT.encode())
+        response = moderator_client.post(
+            EVENT_IMPORT_URL, data={"file": file}, format="multipart"
+        )
+        assert response.data["created"] == 2
+        assert [error["row"] for error in response.data["errors"]] == [3, 4]
+        events = Event.objects.order_by("title")
+        assert [event.title for event in events] == ["title1", "title2"]
+        assert [event.capacity for event in events] == [10, None]
+        assert all(event.user_id == moderator_user.id for event in events)
+
+    def test_import_events_ndjson(self, moderator_client):
+        """
+        События импортируются из NDJSON, некорректный JSON попадает в ошибки
+        """
+        rows = [
+            json.dumps(
+                {
+                    "title": f"title{number}",
+                    "type": "LOCAL",
+                    "address": "address",
+                    "description": "description",
+                    "start_at": "3022-12-12T00:00:00Z",
+                }
+            )
+            for number in range(5)
+        ]
+        rows.insert(2, "{not json")
+        file = SimpleUploadedFile("events.ndjson", "\n".join(rows).encode())
+        response = moderator_client.post(
+            EVENT_IMPORT_URL, data={"file": file}, format="multipart"
+        )
+        assert response.data["created"] == 5
+        assert [error["row"] for error in response.data["errors"]] == [3]
+
+    def test_import_events_unknown_extension(self, moderator_client):
+        """
+        Файл неизвестного формата не принимается
+        """
+        file = SimpleUploadedFile("events.xml", b"<events/>")
+        response = moderator_client.post(
+            EVENT_IMPORT_URL, data={"file": file}, format="multipart"
+        )
+        assert response.status_code == 400
+
+    def test_import_events_command(self, tmp_path, moderator_user):
+        """
+        Команда импортирует события пачками
+        """
+        path = tmp_path / "events.csv"
+        path.write_text(CSV_CONTENT)
+        call_command(
+            "import_events",
+            str(path),
+            "--username",
+            moderator_user.username,
+            "--batch-size",
+            "1",
+        )
+        assert Event.objects.count() == 2
@@ -1,7 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from rest_framework.test import APIClient
+
+from event.models import Event, EventParticipant, Notification
+from event.utils import build_email
 
 EVENT_REGISTRATION_URL = "event_registration"
+EVENT_BULK_REGISTRATION_URL = "event_bulk_registration"
+EVENT_PARTICIPANTS_URL = "event-participants"
+
+User = get_user_model()
+
+
+def data_queries(context):
+    return [
+        query["sql"]
+        for query in context.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+
 
 pytestmark = pytest.mark.django_db
 
@@ -24,3 +49,246 @@ class TestEventRegistrationAPI:
         assert response.status_code == code, (
             f"Проверьте, что при POST запросе {url} " f"возвращается статус {code}"
         )
+
+    def test_event_registration_toggle(
+        self, not_moderator_client, not_moderator_user, event
+    ):
+        """
+        Повторный запрос удаляет заявку, в ответе возвращается новое
+        состояние заявки
+        """
+        url = reverse(EVENT_REGISTRATION_URL, args=[event.id])
+        response = not_moderator_client.post(url)
+        assert response.data["registered"] is True
+        assert EventParticipant.objects.filter(
+            event=event, user=not_moderator_user
+        ).exists(), f"Проверьте, что при POST запросе {url} создается заявка"
+        with CaptureQueriesContext(connection) as context:
+            response = not_moderator_client.post(url)
+        assert response.data["registered"] is False
+        assert len(data_queries(context)) == 2, (
+            f"Проверьте, что при POST запросе {url} заявка удаляется "
+            f"одним запросом вместе с обновлением счетчика участников"
+        )
+        assert not EventParticipant.objects.filter(event=event).exists()
+
+    def test_event_registration_missing_event(self, not_moderator_client):
+        """
+        Нельзя подать заявку на несуществующее событие
+        """
+        url = reverse(EVENT_REGISTRATION_URL, args=[0])
+        response = not_moderator_client.post(url)
+        assert (
+            response.status_code == 404
+        ), f"Проверьте, что при POST запросе {url} возвращается статус 404"
+
+    def test_event_registration_concurrent_duplicate(
+        self, not_moderator_client, event_participant, event, monkeypatch
+    ):
+        """
+        Заявка, созданная параллельным запросом, не приводит к ошибке
+        и повторному уведомлению
+        """
+        monkeypatch.setattr(QuerySet, "delete", lambda queryset: (0, {}))
+        url = reverse(EVENT_REGISTRATION_URL, args=[event.id])
+        response = not_moderator_client.post(url)
+        assert (
+            response.status_code == 200
+        ), f"Проверьте, что при POST запросе {url} возвращается статус 200"
+        assert response.data["registered"] is True
+        assert not Notification.objects.exists()
+
+    @pytest.mark.parametrize(
+        "user_client, code",
+        [
+            (pytest.lazy_fixture("moderator_client"), 403),
+            (pytest.lazy_fixture("not_moderator_client"), 200),
+            (pytest.lazy_fixture("guest_client"), 403),
+        ],
+    )
+    def test_event_bulk_registration_url(self, user_client, code, event, event_2):
+        """
+        Только не модератор может подать заявки на список событий
+        """
+        url = reverse(EVENT_BULK_REGISTRATION_URL)
+        response = user_client.post(url, data={"events": [event.id, event_2.id]})
+        assert response.status_code == code, (
+            f"Проверьте, что при POST запросе {url} " f"возвращается статус {code}"
+        )
+
+    def test_event_bulk_registration(
+        self, not_moderator_client, moderator_user, event_participant
+    ):
+        """
+        Заявки на список событий создаются фиксированным кол-вом запросов,
+        уже существующие заявки пропускаются
+        """
+        Event.objects.bulk_create(
+            Event(
+                user=moderator_user,
+                title=f"title{number}",
+                type="LOCAL",
+                address="address",
+                description="description",
+                start_at="3022-12-12T00:00:00Z",
+            )
+            for number in range(20)
+        )
+        event_ids = list(Event.objects.values_list("id", flat=True))
+        url = reverse(EVENT_BULK_REGISTRATION_URL)
+        with CaptureQueriesContext(connection) as context:
+            response = not_moderator_client.post(
+                url, data={"events": event_ids + [999999]}
+            )
+        assert response.status_code == 200
+        assert len(data_queries(context)) <= 5, (
+            f"Проверьте, что при POST запросе {url} кол-во запросов к БД "
+            f"не зависит от кол-ва событий"
+        )
+        assert len(response.data["events"]) == 20
+        assert response.data["not_found"] == [999999]
+        assert EventParticipant.objects.count() == 21
+        assert Notification.objects.count() == 20
+        response = not_moderator_client.delete(url, data={"events": event_ids})
+        assert response.data["count"] == 21
+        assert not EventParticipant.objects.exists()
+
+    @pytest.mark.parametrize(
+        "user_client, code",
+        [
+            (pytest.lazy_fixture("moderator_client"), 200),
+            (pytest.lazy_fixture("not_moderator_client"), 403),
+            (pytest.lazy_fixture("guest_client"), 403),
+        ],
+    )
+    def test_event_participants_bulk_add_url(
+        self, user_client, code, event, not_moderator_user, user_1
+    ):
+        """
+        Только автор события может зарегистрировать на него пользователей
+        """
+        url = reverse(EVENT_PARTICIPANTS_URL, args=[event.id])
+        users = [not_moderator_user.id, user_1.id]
+        response = user_client.post(url, data={"users": users})
+        assert response.status_code == code, (
+            f"Проверьте, что при POST запросе {url} " f"возвращается статус {code}"
+        )
+        if code == 200:
+            assert event.event_participants.count() == 2
+            response = user_client.delete(url, data={"users": users})
+            assert response.data["count"] == 2
+
+    def test_event_participants_bulk_add_notification(
+        self, moderator_client, event, not_moderator_user, user_1, settings
+    ):
+        """
+        Массовая регистрация пользователей на событие ставит в очередь одно
+        сводное уведомление организатору и без режима сводки
+        """
+        settings.NOTIFICATION_DIGEST_WINDOW = 0
+        url = reverse(EVENT_PARTICIPANTS_URL, args=[event.id])
+        moderator_client.post(url, data={"users": [not_moderator_user.id, user_1.id]})
+        notification = Notification.objects.get(event=event)
+        assert sorted(notification.recipients) == sorted(
+            [not_moderator_user.email, user_1.email]
+        ), "Проверьте, что уведомление содержит всех зарегистрированных участников"
+        message = build_email([notification])
+        assert not_moderator_user.email in message.body
+        assert user_1.email in message.body
+
+    def test_event_registration_capacity(self, not_moderator_client, event, user_1):
+        """
+        Нельзя подать заявку на событие, на котором не осталось мест,
+        счетчик участников обновляется при регистрации и отмене
+        """
+        Event.objects.filter(id=event.id).update(capacity=1)
+        url = reverse(EVENT_REGISTRATION_URL, args=[event.id])
+        response = not_moderator_client.post(url)
+        assert response.status_code == 200
+        event.refresh_from_db()
+        assert event.participants_count == 1
+        client = APIClient()
+        client.force_authenticate(user=user_1)
+        response = client.post(url)
+        assert response.status_code == 400, (
+            f"Проверьте, что при POST запросе {url} на событие без свободных "
+            f"мест возвращается статус 400"
+        )
+        not_moderator_client.post(url)
+        event.refresh_from_db()
+        assert event.participants_count == 0
+        response = client.post(url)
+        assert response.status_code == 200
+
+    def test_user_delete_releases_seats(
+        self,
+        not_moderator_client,
+        not_moderator_user,
+        event,
+        review,
+        django_capture_on_commit_callbacks,
+    ):
+        """
+        Удаление пользователя освобождает его места на событиях и
+        пересчитывает статистику отзывов
+        """
+        url = reverse(EVENT_REGISTRATION_URL, args=[event.id])
+        not_moderator_client.post(url)
+        Event.objects.filter(id=event.id).update(reviews_count=1)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = not_moderator_client.delete(
+                reverse("user-detail", args=[not_moderator_user.id])
+            )
+        assert response.status_code == 204
+        event.refresh_from_db()
+        assert event.participants_count == 0, (
+            "Проверьте, что удаление пользователя уменьшает счетчик участников"
+        )
+        assert event.reviews_count == 0, (
+            "Проверьте, что удаление пользователя пересчитывает статистику отзывов"
+        )
+        call_command("recompute_participants_count", "--check")
+
+    def test_recompute_participants_count_command(self, event, event_participant):
+        """
+        Команда проверяет и пересчитывает счетчики участников событий
+        """
+        with pytest.raises(CommandError, match=str(event.id)):
+            call_command("recompute_participants_count", "--check")
+        call_command("recompute_participants_count")
+        call_command("recompute_participants_count", "--check")
+        event.refresh_from_db()
+        assert event.participants_count == 1
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="Параллельные транзакции проверяются только на PostgreSQL",
+    )
+    def test_event_registration_concurrent_capacity(self, event):
+        """
+        Параллельные заявки не превышают кол-во мест на событии
+        """
+        capacity = 5
+        Event.objects.filter(id=event.id).update(capacity=capacity)
+        User.objects.bulk_create(
+            User(username=f"participant{number}", email=f"p{number}@test.com")
+            for number in range(40)
+        )
+        users = list(User.objects.filter(username__startswith="participant"))
+        url = reverse(EVENT_REGISTRATION_URL, args=[event.id])
+
+        def register(user):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            try:
+                return client.post(url).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            codes = list(executor.map(register, users))
+        event.refresh_from_db()
+        assert codes.count(200) == capacity
+        assert event.participants_count == capacity
+        assert event.event_participants.count() == capacity
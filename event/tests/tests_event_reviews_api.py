@@ -1,7 +1,10 @@
 import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from event.models import Review
+from event.models import Event, Review
 
 pytestmark = pytest.mark.django_db
 
@@ -192,3 +195,84 @@ class TestReviewsAPI:
         assert response.status_code == code, (
             f"Проверьте, что при PATCH запросе {url} " f"возвращается статус {code}"
         )
+
+    @pytest.mark.parametrize(
+        "user_client, method, code",
+        [
+            (pytest.lazy_fixture("guest_client"), "get", 200),
+            (pytest.lazy_fixture("moderator_client"), "patch", 403),
+            (pytest.lazy_fixture("not_moderator_client"), "patch", 200),
+            (pytest.lazy_fixture("not_moderator_client"), "delete", 204),
+        ],
+    )
+    def test_review_detail_single_review_query(
+        self, user_client, method, code, event_2, review_2
+    ):
+        """
+        Детальный запрос отзыва выполняет ровно один запрос к таблице
+        отзывов и не запрашивает событие отдельно
+        """
+        url = reverse(EVENT_REVIEWS_DETAIL_URL, args=[event_2.id, review_2.id])
+        with CaptureQueriesContext(connection) as context:
+            if method == "patch":
+                response = user_client.patch(url, data={"text": "text2"})
+            else:
+                response = getattr(user_client, method)(url)
+        assert response.status_code == code
+        selects = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+        review_queries = [sql for sql in selects if 'FROM "event_review"' in sql]
+        event_queries = [sql for sql in selects if 'FROM "event_event"' in sql]
+        assert len(review_queries) == 1 and not event_queries, (
+            f"Проверьте, что при {method.upper()} запросе {url} отзыв "
+            f"запрашивается из БД ровно один раз"
+        )
+
+    def test_get_review_of_other_event(self, guest_client, event, event_2, review_2):
+        """
+        Отзыв не доступен по адресу другого события
+        """
+        url = reverse(EVENT_REVIEWS_DETAIL_URL, args=[event.id, review_2.id])
+        response = guest_client.get(url)
+        assert response.status_code == 404, (
+            f"Проверьте, что при GET запросе {url} возвращается статус 404"
+        )
+
+    def test_event_review_stats(
+        self, not_moderator_client, event_2, event_participant_2
+    ):
+        """
+        Кол-во отзывов и дата последнего отзыва события обновляются при
+        создании и удалении отзыва
+        """
+        url = reverse(EVENT_REVIEWS_LIST_URL, args=[event_2.id])
+        response = not_moderator_client.post(url, data={"text": "text"})
+        assert response.status_code == 201
+        event_2.refresh_from_db()
+        review = Review.objects.get(id=response.data["id"])
+        assert event_2.reviews_count == 1
+        assert event_2.last_review_at == review.pub_date
+        url = reverse(EVENT_REVIEWS_DETAIL_URL, args=[event_2.id, review.id])
+        response = not_moderator_client.delete(url)
+        assert response.status_code == 204
+        event_2.refresh_from_db()
+        assert event_2.reviews_count == 0
+        assert event_2.last_review_at is None
+
+    def test_recompute_review_stats_command(self, event, event_2, review, review_2):
+        """
+        Команда проверяет и пересчитывает статистику отзывов событий
+        """
+        with pytest.raises(CommandError):
+            call_command("recompute_review_stats", "--check")
+        call_command("recompute_review_stats")
+        call_command("recompute_review_stats", "--check")
+        event_2.refresh_from_db()
+        assert event_2.reviews_count == 1
+        assert event_2.last_review_at == review_2.pub_date
+        Event.objects.filter(id=event.id).update(reviews_count=5)
+        with pytest.raises(CommandError, match=str(event.id)):
+            call_command("recompute_review_stats", "--check")
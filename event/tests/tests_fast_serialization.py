@@ -0,0 +1,118 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from event.converters import get_row_converter
+from event.models import Event, Review
+from event.renderers import FastJSONRenderer
+from event.serializers import (
+    EventModeratorSerializer,
+    EventSerializer,
+    ReviewSerializer,
+    UserSerializer,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+class TestRowConverter:
+    @pytest.mark.parametrize(
+        "serializer_class, model, items",
+        [
+            (EventSerializer, Event, pytest.lazy_fixture("event")),
+            (ReviewSerializer, Review, pytest.lazy_fixture("review")),
+        ],
+    )
+    def test_same_as_serializer(self, serializer_class, model, items):
+        """
+        Строки .values() преобразуются так же, как объекты сериализатором,
+        включая дату и время (DATETIME_FORMAT) и ссылки на файлы
+        """
+        request = APIRequestFactory().get("/")
+        queryset = model.objects.order_by("id")
+        converter = get_row_converter(serializer_class)
+        expected = serializer_class(
+            queryset, many=True, context={"request": request}
+        ).data
+        assert converter.convert(queryset.values(*converter.columns), request) == [
+            dict(item) for item in expected
+        ], "Проверьте, что RowConverter возвращает те же данные, что и сериализатор"
+
+    def test_null_values(self, event):
+        """
+        Пустые дата и время остаются None
+        """
+        converter = get_row_converter(EventSerializer)
+        event.last_review_at = None
+        event.save()
+        (item,) = converter.convert(Event.objects.values(*converter.columns))
+        assert item["last_review_at"] is None
+
+    def test_unsupported_serializer(self):
+        """
+        Сериализатор с SerializerMethodField не поддерживается
+        """
+        assert get_row_converter(EventModeratorSerializer) is None
+
+    def test_write_only_fields(self):
+        """
+        Поля только для записи не выбираются из БД
+        """
+        assert "password" not in get_row_converter(UserSerializer).columns
+
+    @pytest.mark.parametrize(
+        "url, kwargs",
+        [
+            ("event-list", {}),
+            ("reviews-list", {"event_id": "event"}),
+            ("my_events", {}),
+        ],
+    )
+    def test_list_queries_values(
+        self,
+        not_moderator_client,
+        event,
+        review,
+        event_participant,
+        django_assert_max_num_queries,
+        url,
+        kwargs,
+    ):
+        """
+        Список отдается через .values() без лишних запросов к БД
+        """
+        kwargs = {key: event.id for key in kwargs}
+        with django_assert_max_num_queries(3):
+            response = not_moderator_client.get(reverse(url, kwargs=kwargs))
+        assert response.status_code == 200
+        assert response.json()["results"], "Проверьте, что список не пустой"
+
+
+class TestFastJSONRenderer:
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"results": [{"id": 1, "title": "Событие", "start_at": None}]},
+            {"text": "разделители \u2028 строк \u2029", "value": 1.5},
+            [{"start_at": datetime(2021, 12, 12, tzinfo=timezone.utc)}],
+            {1: "ключ не строка"},
+        ],
+    )
+    def test_same_as_json_renderer(self, data):
+        """
+        FastJSONRenderer возвращает те же байты, что и JSONRenderer
+        """
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent(self):
+        """
+        При запросе отступов используется JSONRenderer
+        """
+        data = {"id": 1}
+        content = FastJSONRenderer().render(data, "application/json; indent=2", {})
+        assert content == JSONRenderer().render(data, "application/json; indent=2", {})
+        assert json.loads(content) == data
@@ -1,6 +1,10 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from event.models import Event, EventParticipant
+
 MY_EVENTS_URL = reverse("my_events")
 
 pytestmark = pytest.mark.django_db
@@ -25,3 +29,43 @@ class TestMyEventAPI:
         assert response.status_code == code, (
             f"Проверьте, что при GET запросе {url} " f"возвращается статус {code}"
         )
+
+    def test_get_my_events_filters(
+        self, not_moderator_client, not_moderator_user, moderator_user, event
+    ):
+        """
+        Список мероприятий пользователя пагинируется, фильтруется по периоду
+        и типу и выбирается одним запросом к БД
+        """
+        past_events = Event.objects.bulk_create(
+            Event(
+                user=moderator_user,
+                title=f"past{number}",
+                type="LOCAL",
+                address="address",
+                description="description",
+                start_at="2000-12-12T00:00:00Z",
+            )
+            for number in range(3)
+        )
+        past_ids = list(
+            Event.objects.filter(title__startswith="past").values_list("id", flat=True)
+        )
+        EventParticipant.objects.bulk_create(
+            EventParticipant(user=not_moderator_user, event_id=event_id)
+            for event_id in past_ids + [event.id]
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = not_moderator_client.get(f"{MY_EVENTS_URL}?count=false&limit=2")
+        assert len(context.captured_queries) == 1, (
+            f"Проверьте, что при GET запросе {MY_EVENTS_URL} события выбираются "
+            f"одним запросом"
+        )
+        assert len(response.data["results"]) == 2
+        assert response.data["next"] is not None
+        response = not_moderator_client.get(f"{MY_EVENTS_URL}?period=upcoming")
+        assert [item["id"] for item in response.data["results"]] == [event.id]
+        response = not_moderator_client.get(f"{MY_EVENTS_URL}?period=past&type=LOCAL")
+        assert response.data["count"] == len(past_events)
+        response = not_moderator_client.get(f"{MY_EVENTS_URL}?type=REGIONAL")
+        assert response.data["count"] == 1
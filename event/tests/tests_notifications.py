@@ -0,0 +1,135 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from event.models import Notification
+from event.utils import queue_email, send_queued_emails
+
+EVENT_REGISTRATION_URL = "event_registration"
+
+pytestmark = pytest.mark.django_db
+
+
+def slow_send_messages(self, messages):
+    time.sleep(5)
+    return len(messages)
+
+
+def failing_send_messages(self, messages):
+    raise ConnectionError("SMTP недоступен")
+
+
+class TestNotifications:
+    def test_registration_queues_notification(
+        self, not_moderator_client, event, monkeypatch
+    ):
+        """
+        Заявка на участие не ждет почтовый сервер, уведомление ставится
+        в очередь
+        """
+        monkeypatch.setattr(EmailBackend, "send_messages", slow_send_messages)
+        url = reverse(EVENT_REGISTRATION_URL, args=[event.id])
+        started = time.monotonic()
+        response = not_moderator_client.post(url)
+        assert response.status_code == 200
+        assert time.monotonic() - started < 1, (
+            f"Проверьте, что при POST запросе {url} письмо не отправляется "
+            f"синхронно"
+        )
+        assert Notification.objects.filter(
+            event=event, kind=Notification.KIND.REGISTRATION
+        ).exists(), "Проверьте, что уведомление поставлено в очередь"
+        assert len(mail.outbox) == 0
+
+    def test_send_queued_emails(self, not_moderator_client, event):
+        """
+        Воркер отправляет уведомления из очереди организатору
+        """
+        not_moderator_client.post(reverse(EVENT_REGISTRATION_URL, args=[event.id]))
+        assert send_queued_emails() == 1
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == [event.user.email]
+        notification = Notification.objects.get(event=event)
+        assert notification.status == Notification.STATUS.SENT
+        assert (
+            send_queued_emails() == 0
+        ), "Проверьте, что отправленное уведомление не отправляется повторно"
+
+    def test_send_queued_emails_retry(
+        self, not_moderator_client, event, monkeypatch, settings
+    ):
+        """
+        Неудачная отправка откладывается, после исчерпания попыток
+        уведомление помечается как FAILED
+        """
+        settings.NOTIFICATION_MAX_ATTEMPTS = 2
+        monkeypatch.setattr(EmailBackend, "send_messages", failing_send_messages)
+        not_moderator_client.post(reverse(EVENT_REGISTRATION_URL, args=[event.id]))
+        send_queued_emails()
+        notification = Notification.objects.get(event=event)
+        assert notification.status == Notification.STATUS.PENDING
+        assert notification.attempts == 1
+        assert (
+            send_queued_emails() == 0
+        ), "Проверьте, что повторная попытка откладывается"
+        Notification.objects.update(send_after=notification.created_at)
+        send_queued_emails()
+        notification.refresh_from_db()
+        assert notification.status == Notification.STATUS.FAILED
+        assert notification.attempts == 2
+
+    def test_send_digest(self, event, event_2, settings):
+        """
+        В режиме сводки уведомления по событию объединяются в одно письмо
+        после окончания окна
+        """
+        settings.NOTIFICATION_DIGEST_WINDOW = 60
+        for number in range(5):
+            queue_email(event, f"user{number}@test.com")
+        queue_email(event, "reviewer@test.com", review=True)
+        queue_email(event_2, "user@test.com")
+        assert (
+            send_queued_emails() == 0
+        ), "Проверьте, что уведомления ждут окончания окна сводки"
+        Notification.objects.update(send_after=timezone.now() - timedelta(seconds=61))
+        assert send_queued_emails() == 7
+        assert (
+            len(mail.outbox) == 2
+        ), "Проверьте, что на каждое событие отправляется одно письмо"
+        digest = next(
+            message for message in mail.outbox if event.title in message.subject
+        )
+        assert "user4@test.com" in digest.body
+        assert "reviewer@test.com" in digest.body
+
+    @pytest.mark.django_db(transaction=True)
+    def test_send_outside_transaction(self, event, monkeypatch):
+        """
+        Письма отправляются вне транзакции, пачка закреплена за воркером
+        """
+        queue_email(event, "user@test.com")
+        sends = []
+        send_messages = EmailBackend.send_messages
+
+        def send(self, messages):
+            sends.append(connection.in_atomic_block)
+            notification = Notification.objects.get(event=event)
+            assert notification.send_after > timezone.now(), (
+                "Проверьте, что отправляемая пачка не видна другим воркерам"
+            )
+            return send_messages(self, messages)
+
+        monkeypatch.setattr(EmailBackend, "send_messages", send)
+        assert send_queued_emails() == 1
+        assert sends == [False], (
+            "Проверьте, что транзакция не открыта во время отправки писем"
+        )
+        notification = Notification.objects.get(event=event)
+        assert notification.status == Notification.STATUS.SENT
+        assert len(mail.outbox) == 1
@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.exceptions import NotFound
+
+from event.models import Event, Review
+from event.pagination import KeysetPagination
+
+User = get_user_model()
+
+EVENT_LIST_URL = reverse("event-list")
+REVIEW_LIST_URL = "reviews-list"
+# значения отличаются меньше чем на миллисекунду
+MICROSECONDS_START = datetime(3022, 12, 12, tzinfo=timezone.utc)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def events(moderator_user):
+    Event.objects.bulk_create(
+        Event(
+            user=moderator_user,
+            title=f"title{number}",
+            type="LOCAL",
+            address="address",
+            description="description",
+            start_at="3022-12-12T00:00:00Z",
+        )
+        for number in range(25)
+    )
+
+
+class TestPagination:
+    def test_cursor_pagination(self, guest_client, events):
+        """
+        Курсорная пагинация проходит по всем объектам без повторов,
+        в том числе при одинаковом start_at
+        """
+        url = f"{EVENT_LIST_URL}?limit=10"
+        ids = []
+        while url:
+            response = guest_client.get(url)
+            assert response.status_code == 200
+            assert response.data["count"] == 25
+            ids.extend(event["id"] for event in response.data["results"])
+            url = response.data["next"]
+        assert ids == list(Event.objects.order_by("id").values_list("id", flat=True)), (
+            f"Проверьте, что при GET запросе {EVENT_LIST_URL} курсорная "
+            f"пагинация возвращает все объекты по одному разу"
+        )
+
+    def test_cursor_pagination_without_count(
+        self, guest_client, events, django_assert_num_queries
+    ):
+        """
+        ?count=false отключает подсчет общего кол-ва объектов
+        """
+        with django_assert_num_queries(1):
+            response = guest_client.get(EVENT_LIST_URL, data={"count": "false"})
+        assert "count" not in response.data, (
+            f"Проверьте, что при GET запросе {EVENT_LIST_URL}?count=false "
+            f"не возвращается count"
+        )
+        assert len(response.data["results"]) == 10
+
+    def test_cursor_pagination_previous(self, guest_client, events):
+        """
+        Ссылка previous возвращает на предыдущую страницу
+        """
+        first = guest_client.get(EVENT_LIST_URL)
+        second = guest_client.get(first.data["next"])
+        previous = guest_client.get(second.data["previous"])
+        assert previous.data["results"] == first.data["results"], (
+            f"Проверьте, что при GET запросе {EVENT_LIST_URL} ссылка previous "
+            f"ведет на предыдущую страницу"
+        )
+
+    def test_limit_offset_pagination(self, guest_client, events):
+        """
+        Пагинация через limit/offset доступна для совместимости
+        """
+        response = guest_client.get(EVENT_LIST_URL, data={"limit": 5, "offset": 20})
+        assert response.data["count"] == 25
+        assert len(response.data["results"]) == 5
+        assert response.data["next"] is None, (
+            f"Проверьте, что при GET запросе {EVENT_LIST_URL} с offset "
+            f"используется пагинация limit/offset"
+        )
+
+    def test_cursor_page_leading_bound(self, guest_client, events):
+        """
+        Запрос следующей страницы ограничивает первое поле сортировки
+        снизу, а не только условием OR
+        """
+        first = guest_client.get(EVENT_LIST_URL, data={"count": "false"})
+        with CaptureQueriesContext(connection) as context:
+            guest_client.get(first.data["next"])
+        (sql,) = [query["sql"] for query in context.captured_queries]
+        assert '"start_at" >= ' in sql, (
+            f"Проверьте, что запрос следующей страницы {EVENT_LIST_URL} "
+            f"содержит условие start_at >= значения курсора"
+        )
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="план SQLite")
+    def test_cursor_page_index_range(self, events):
+        """
+        Страница выбирается диапазоном индекса (start_at, id)
+        """
+        event = Event.objects.order_by("start_at", "id")[10]
+        keyset = KeysetPagination.get_keyset_filter(
+            ["start_at", "id"], [event.start_at, event.id]
+        )
+        queryset = Event.objects.order_by("start_at", "id").filter(keyset)[:10]
+        assert "USING INDEX event_start_at_idx (start_at>?)" in queryset.explain()
+
+    def get_all_ids(self, client, url):
+        ids = []
+        # курсор, не продвигающийся вперед, не должен зациклить тест
+        for _ in range(20):
+            if not url:
+                break
+            response = client.get(url)
+            assert response.status_code == 200
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_cursor_microseconds(self, guest_client, moderator_user):
+        """
+        Курсор сохраняет микросекунды start_at: страницы не повторяют и не
+        теряют события, отличающиеся меньше чем на миллисекунду
+        """
+        Event.objects.bulk_create(
+            Event(
+                user=moderator_user,
+                title=f"title{number}",
+                type="LOCAL",
+                address="address",
+                description="description",
+                start_at=MICROSECONDS_START + timedelta(microseconds=number * 100),
+            )
+            for number in range(12)
+        )
+        ids = self.get_all_ids(guest_client, f"{EVENT_LIST_URL}?limit=5")
+        assert ids == list(
+            Event.objects.order_by("start_at", "id").values_list("id", flat=True)
+        ), "Проверьте, что курсор не теряет микросекунды даты и времени"
+
+    def test_review_cursor_microseconds(self, guest_client, event):
+        """
+        Курсор списка отзывов (-pub_date) сохраняет микросекунды pub_date
+        """
+        User.objects.bulk_create(
+            User(username=f"author{number}", email=f"author{number}@mail.ru")
+            for number in range(30)
+        )
+        Review.objects.bulk_create(
+            Review(text="text", author=author, event=event)
+            for author in User.objects.filter(username__startswith="author")
+        )
+        reviews = list(Review.objects.filter(event=event))
+        for number, review in enumerate(reviews):
+            review.pub_date = MICROSECONDS_START + timedelta(microseconds=number * 10)
+        Review.objects.bulk_update(reviews, ["pub_date"])
+        url = reverse(REVIEW_LIST_URL, args=[event.id])
+        ids = self.get_all_ids(guest_client, f"{url}?limit=5")
+        assert ids == list(
+            Review.objects.order_by("-pub_date", "id").values_list("id", flat=True)
+        ), "Проверьте, что курсор не теряет микросекунды даты и времени"
+
+    def test_invalid_datetime_cursor(self):
+        """
+        Курсор с неверной датой - ошибка 404
+        """
+        pagination = KeysetPagination()
+        pagination.ordering = ["start_at", "id"]
+        with pytest.raises(NotFound):
+            pagination.parse_position(Event, ["not a date", 1])
@@ -0,0 +1,171 @@
+import asyncio
+import os
+import threading
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from django.urls import reverse
+
+from event.profiling import Profile, ProfilingMiddleware, profiled, timed
+
+EVENT_LIST_URL = "event-list"
+METRICS_URL = "metrics"
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_SAMPLE_RATE = 1
+    # метрики требуют кэш, общий для процессов
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    }
+    settings.METRICS_TOKEN = "metrics-token"
+    return settings
+
+
+class TestProfiling:
+    def test_server_timing(self, profiling, guest_client, event):
+        """
+        Замеренный запрос возвращает заголовок Server-Timing
+        """
+        response = guest_client.get(reverse(EVENT_LIST_URL))
+        timing = response["Server-Timing"]
+        for metric in ("total;dur=", "db;dur=", "serializer;dur=", "template;dur="):
+            assert metric in timing, (
+                f"Проверьте, что заголовок Server-Timing содержит {metric}"
+            )
+        assert '"2 queries' in timing
+
+    @pytest.mark.django_db(transaction=True)
+    def test_server_timing_asgi(self, profiling, event):
+        """
+        Под ASGI учитываются запросы к БД из потока представления
+        """
+        response = asyncio.run(AsyncClient().get(reverse(EVENT_LIST_URL)))
+        assert '"2 queries' in response["Server-Timing"]
+
+    @pytest.mark.parametrize("sample_rate", [0, 1])
+    def test_async_middleware(self, profiling, sample_rate):
+        """
+        Под ASGI запрос не уходит в синхронный поток Django: ответ
+        получается в потоке event loop
+        """
+        profiling.PROFILING_SAMPLE_RATE = sample_rate
+
+        async def get_response(request):
+            return HttpResponse(str(threading.get_ident()))
+
+        async def call():
+            middleware = ProfilingMiddleware(get_response)
+            assert asyncio.iscoroutinefunction(middleware)
+            response = await middleware(RequestFactory().get("/"))
+            return response, threading.get_ident()
+
+        response, loop_thread = asyncio.run(call())
+        assert response.content.decode() == str(loop_thread), (
+            "Проверьте, что ProfilingMiddleware работает асинхронно"
+        )
+        assert response.has_header("Server-Timing") == bool(sample_rate)
+
+    @pytest.mark.parametrize("enabled, sample_rate", [(False, 1), (True, 0)])
+    def test_not_sampled(self, profiling, guest_client, enabled, sample_rate):
+        """
+        Без PROFILING_ENABLED и вне выборки запрос не замеряется
+        """
+        profiling.PROFILING_ENABLED = enabled
+        profiling.PROFILING_SAMPLE_RATE = sample_rate
+        response = guest_client.get(reverse(EVENT_LIST_URL))
+        assert not response.has_header("Server-Timing")
+
+    @pytest.mark.parametrize(
+        "user_client, authorization, code",
+        [
+            (pytest.lazy_fixture("guest_client"), "Bearer metrics-token", 200),
+            (pytest.lazy_fixture("guest_client"), "Bearer wrong", 403),
+            (pytest.lazy_fixture("guest_client"), "", 403),
+            (pytest.lazy_fixture("moderator_client"), "", 403),
+        ],
+    )
+    def test_metrics_url(self, profiling, user_client, authorization, code):
+        """
+        Метрики доступны только по токену сборщика метрик
+        """
+        url = reverse(METRICS_URL)
+        response = user_client.get(url, HTTP_AUTHORIZATION=authorization)
+        assert response.status_code == code, (
+            f"Проверьте, что при GET запросе {url} возвращается статус {code}"
+        )
+
+    def test_metrics_without_token(self, profiling, guest_client):
+        """
+        Без METRICS_TOKEN метрики недоступны
+        """
+        profiling.METRICS_TOKEN = ""
+        response = guest_client.get(reverse(METRICS_URL), HTTP_AUTHORIZATION="Bearer ")
+        assert response.status_code == 403
+
+    def test_metrics(self, profiling, guest_client, event):
+        """
+        Замеры суммируются в метриках по имени представления
+        """
+        guest_client.get(reverse(EVENT_LIST_URL))
+        guest_client.get(reverse(EVENT_LIST_URL))
+        response = guest_client.get(
+            reverse(METRICS_URL), HTTP_AUTHORIZATION="Bearer metrics-token"
+        )
+        assert response["Content-Type"].startswith("text/plain")
+        content = response.content.decode()
+        assert 'alente_sampled_requests_total{view="event-list"} 2' in content
+        # второй ответ взят из кэша событий
+        assert 'alente_db_queries_total{view="event-list"} 2' in content
+        assert "# TYPE alente_db_seconds_total counter" in content
+
+    def test_local_cache_rejected(self, settings):
+        """
+        Метрики в кэше процесса (locmem) не собираются: у каждого воркера
+        были бы свои счетчики
+        """
+        settings.PROFILING_ENABLED = True
+        with pytest.raises(ImproperlyConfigured):
+            ProfilingMiddleware(lambda request: None)
+
+    def test_slow_request_profile(self, profiling, guest_client, tmp_path):
+        """
+        Профиль замеренного запроса дольше порога сохраняется
+        """
+        profiling.PROFILING_DUMP_DIR = str(tmp_path / "profiles")
+        profiling.PROFILING_SLOW_THRESHOLD = 0
+        guest_client.get(reverse(EVENT_LIST_URL))
+        files = os.listdir(tmp_path / "profiles")
+        assert len(files) == 1 and files[0].endswith("_event-list.prof")
+
+
+class TestProfile:
+    def test_duplicate_queries(self):
+        """
+        Повторы запроса с теми же и с другими параметрами считаются отдельно
+        """
+        profile = Profile()
+        profile.add_query("SELECT %s", (1,))
+        profile.add_query("SELECT %s", (1,))
+        profile.add_query("SELECT %s", (2,))
+        assert (profile.queries, profile.duplicates, profile.similar) == (3, 1, 1)
+
+    def test_profiled_block(self, profiling):
+        """
+        Вложенные блоки с одним именем учитываются один раз
+        """
+        with profiled("block") as profile:
+            with timed("template"):
+                with timed("template"):
+                    pass
+        assert profile.timings["template"] > 0
+        assert profile.timings["template"] <= profile.timings["total"]
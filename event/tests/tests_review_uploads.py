@@ -0,0 +1,378 @@
+import os
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from conftest import SMALL_GIF
+from event import uploads, views
+from event.models import Review, ReviewUpload
+from event.storage import review_storage
+from event.uploads import (
+    get_part_path,
+    process_review_uploads,
+    release_review_file,
+)
+
+REVIEW_ATTACHMENT_URL = "reviews-attachment"
+REVIEW_FILE_URL = "reviews-download"
+REVIEW_DETAIL_URL = "reviews-detail"
+REVIEW_LIST_URL = "reviews-list"
+
+pytestmark = pytest.mark.django_db
+
+
+def reject_all(path):
+    return False
+
+
+def create_processing_upload(review, content=SMALL_GIF, **kwargs):
+    """
+    Полностью загруженный файл, ожидающий воркера
+    """
+    upload = ReviewUpload.objects.create(
+        review=review,
+        filename="a.gif",
+        content_type="image/gif",
+        size=len(content),
+        offset=len(content),
+        status=ReviewUpload.STATUS.PROCESSING,
+        **kwargs,
+    )
+    os.makedirs(settings.REVIEW_UPLOAD_TEMP_DIR, exist_ok=True)
+    with open(get_part_path(upload), "wb") as part:
+        part.write(content)
+    return upload
+
+
+def put_chunk(client, url, data, offset):
+    return client.put(
+        url,
+        data=data,
+        content_type="application/octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+class TestReviewUploads:
+    @pytest.mark.parametrize(
+        "user_client, code",
+        [
+            (pytest.lazy_fixture("moderator_client"), 403),
+            (pytest.lazy_fixture("not_moderator_client"), 201),
+            (pytest.lazy_fixture("guest_client"), 403),
+        ],
+    )
+    def test_start_attachment_url(self, user_client, code, event_2, review_2):
+        """
+        Загрузить файл может только автор отзыва
+        """
+        url = reverse(REVIEW_ATTACHMENT_URL, args=[event_2.id, review_2.id])
+        data = {"filename": "a.gif", "content_type": "image/gif", "size": 10}
+        response = user_client.post(url, data=data)
+        assert response.status_code == code, (
+            f"Проверьте, что при POST запросе {url} возвращается статус {code}"
+        )
+
+    @pytest.mark.parametrize(
+        "filename, size",
+        [("a.exe", 10), ("a.gif", 10 ** 12)],
+    )
+    def test_start_attachment_limits(
+        self, not_moderator_client, event_2, review_2, filename, size
+    ):
+        """
+        Тип и размер файла проверяются до загрузки содержимого
+        """
+        url = reverse(REVIEW_ATTACHMENT_URL, args=[event_2.id, review_2.id])
+        data = {"filename": filename, "content_type": "image/gif", "size": size}
+        response = not_moderator_client.post(url, data=data)
+        assert response.status_code == 400
+        assert not ReviewUpload.objects.exists()
+
+    def test_chunked_upload(self, not_moderator_client, event_2, review_2):
+        """
+        Файл загружается частями, загрузка продолжается с offset, после
+        обработки воркером файл отдается через X-Accel-Redirect
+        """
+        url = reverse(REVIEW_ATTACHMENT_URL, args=[event_2.id, review_2.id])
+        data = {
+            "filename": "image.gif",
+            "content_type": "image/gif",
+            "size": len(SMALL_GIF),
+        }
+        response = not_moderator_client.post(url, data=data)
+        assert response.status_code == 201
+        response = put_chunk(not_moderator_client, url, SMALL_GIF[:20], 0)
+        assert response.status_code == 200
+        assert response.data["offset"] == 20
+        response = put_chunk(not_moderator_client, url, SMALL_GIF[20:], 0)
+        assert response.status_code == 400, (
+            f"Проверьте, что при PUT запросе {url} с неверным смещением "
+            f"возвращается статус 400"
+        )
+        offset = not_moderator_client.get(url).data["offset"]
+        response = put_chunk(not_moderator_client, url, SMALL_GIF[offset:], offset)
+        assert response.data["status"] == ReviewUpload.STATUS.PROCESSING
+        assert process_review_uploads() == 1
+        response = not_moderator_client.get(url)
+        assert response.data["status"] == ReviewUpload.STATUS.READY
+        assert len(response.data["checksum"]) == 64
+        review_2.refresh_from_db()
+        with review_2.file.open("rb") as file:
+            assert file.read() == SMALL_GIF
+        assert not os.path.exists(get_part_path(ReviewUpload.objects.get()))
+        file_url = reverse(REVIEW_FILE_URL, args=[event_2.id, review_2.id])
+        response = not_moderator_client.get(file_url)
+        assert response.status_code == 200
+        assert response["X-Accel-Redirect"] == (
+            f"{settings.PROTECTED_MEDIA_URL}{review_2.file.name}"
+        )
+        assert response.content == b""
+
+    def test_chunk_size_limit(self, not_moderator_client, event_2, review_2, settings):
+        """
+        Часть больше REVIEW_UPLOAD_CHUNK_SIZE отклоняется до чтения тела
+        """
+        settings.REVIEW_UPLOAD_CHUNK_SIZE = 10
+        url = reverse(REVIEW_ATTACHMENT_URL, args=[event_2.id, review_2.id])
+        data = {"filename": "a.gif", "content_type": "image/gif", "size": 20}
+        not_moderator_client.post(url, data=data)
+        response = put_chunk(not_moderator_client, url, b"0" * 20, 0)
+        assert response.status_code == 400
+        assert ReviewUpload.objects.get().offset == 0
+
+    def test_infected_upload_rejected(
+        self, not_moderator_client, event_2, review_2, settings
+    ):
+        """
+        Файл, не прошедший проверку на вирусы, не сохраняется
+        """
+        settings.REVIEW_FILE_SCANNER = f"{__name__}.reject_all"
+        url = reverse(REVIEW_ATTACHMENT_URL, args=[event_2.id, review_2.id])
+        data = {"filename": "a.txt", "content_type": "text/plain", "size": 4}
+        not_moderator_client.post(url, data=data)
+        put_chunk(not_moderator_client, url, b"text", 0)
+        file_name = review_2.file.name
+        process_review_uploads()
+        upload = ReviewUpload.objects.get()
+        assert upload.status == ReviewUpload.STATUS.REJECTED
+        review_2.refresh_from_db()
+        assert review_2.file.name == file_name
+
+    def test_same_files_stored_once(
+        self,
+        not_moderator_client,
+        event,
+        event_2,
+        review,
+        review_2,
+        django_capture_on_commit_callbacks,
+        settings,
+    ):
+        """
+        Одинаковые файлы хранятся один раз и удаляются из хранилища вместе
+        с последним ссылающимся на них отзывом
+        """
+        settings.REVIEW_FILE_RELEASE_DELAY = 0
+        assert review.file.name == review_2.file.name
+        assert review_storage.exists(review.file.name)
+        for current, deleted in ((review, False), (review_2, True)):
+            url = reverse(REVIEW_DETAIL_URL, args=[current.event_id, current.id])
+            with django_capture_on_commit_callbacks(execute=True):
+                response = not_moderator_client.delete(url)
+            assert response.status_code == 204
+            assert review_storage.exists(review.file.name) is not deleted, (
+                f"Проверьте, что после DELETE запроса {url} файл удаляется, "
+                f"только если на него не ссылаются другие отзывы"
+            )
+
+    def test_known_file_upload_reuses_blob(
+        self, not_moderator_client, event, event_2, review, review_2
+    ):
+        """
+        Загрузка уже известного файла ссылается на существующий файл
+        """
+        Review.objects.filter(id=review_2.id).update(file="")
+        url = reverse(REVIEW_ATTACHMENT_URL, args=[event_2.id, review_2.id])
+        data = {
+            "filename": "copy.gif",
+            "content_type": "image/gif",
+            "size": len(SMALL_GIF),
+        }
+        not_moderator_client.post(url, data=data)
+        put_chunk(not_moderator_client, url, SMALL_GIF, 0)
+        process_review_uploads()
+        review_2.refresh_from_db()
+        assert review_2.file.name == review.file.name
+
+    def test_review_file_not_public(self, guest_client, event, review):
+        """
+        Файл отзыва хранится вне MEDIA_ROOT, ссылка в API ведет на Django,
+        который отдает файл через nginx (X-Accel-Redirect)
+        """
+        assert review.file.path.startswith(settings.REVIEW_MEDIA_ROOT)
+        assert not os.path.exists(os.path.join(settings.MEDIA_ROOT, review.file.name))
+        response = guest_client.get(reverse(REVIEW_LIST_URL, args=[event.id]))
+        file_url = response.json()["results"][0]["file"]
+        assert settings.MEDIA_URL not in file_url, (
+            "Проверьте, что API не возвращает публичную ссылку на файл отзыва"
+        )
+        response = guest_client.get(file_url)
+        assert response.status_code == 200
+        assert response["X-Accel-Redirect"] == (
+            f"{settings.PROTECTED_MEDIA_URL}{review.file.name}"
+        )
+        response = guest_client.get(
+            reverse("review_file", args=["reviews/00/unknown.gif"])
+        )
+        assert response.status_code == 404, (
+            "Проверьте, что по ссылке отдаются только файлы отзывов"
+        )
+
+    def test_chunk_read_before_lock(
+        self, not_moderator_client, event_2, review_2, monkeypatch
+    ):
+        """
+        Тело части читается до блокировки загрузки (select_for_update)
+        """
+        url = reverse(REVIEW_ATTACHMENT_URL, args=[event_2.id, review_2.id])
+        data = {"filename": "a.txt", "content_type": "text/plain", "size": 4}
+        not_moderator_client.post(url, data=data)
+        calls = []
+        read_chunk = views.read_chunk
+        select_for_update = ReviewUpload.objects.select_for_update
+
+        def read(*args):
+            calls.append("read")
+            return read_chunk(*args)
+
+        def lock(*args, **kwargs):
+            calls.append("lock")
+            return select_for_update(*args, **kwargs)
+
+        monkeypatch.setattr(views, "read_chunk", read)
+        monkeypatch.setattr(ReviewUpload.objects, "select_for_update", lock)
+        response = put_chunk(not_moderator_client, url, b"text", 0)
+        assert response.data["offset"] == 4
+        assert calls == ["read", "lock"], (
+            "Проверьте, что часть файла читается до блокировки загрузки"
+        )
+        assert not [
+            name
+            for name in os.listdir(settings.REVIEW_UPLOAD_TEMP_DIR)
+            if name.endswith(".chunk")
+        ], "Проверьте, что временный файл части удаляется"
+
+    def test_release_keeps_reused_file(
+        self, review, settings, django_capture_on_commit_callbacks
+    ):
+        """
+        Файл без ссылок, только что использованный параллельной загрузкой,
+        не удаляется сразу, его удаляет collect_review_files
+        """
+        name = review.file.name
+        Review.objects.filter(id=review.id).update(file="")
+        # загрузка того же содержимого, отзыв с ней еще не закоммичен
+        assert review_storage.save("reviews/copy.gif", ContentFile(SMALL_GIF)) == name
+        with django_capture_on_commit_callbacks(execute=True):
+            release_review_file(name)
+        assert review_storage.exists(name), (
+            "Проверьте, что повторно использованный файл не удаляется"
+        )
+        with pytest.raises(CommandError):
+            call_command("collect_review_files", "--check")
+        settings.REVIEW_FILE_RELEASE_DELAY = 0
+        call_command("collect_review_files")
+        assert not review_storage.exists(name)
+        call_command("collect_review_files", "--check")
+
+    def test_thumbnail_released(
+        self,
+        not_moderator_client,
+        event,
+        review,
+        settings,
+        django_capture_on_commit_callbacks,
+    ):
+        """
+        Превью удаляется из хранилища вместе с отзывом
+        """
+        settings.REVIEW_FILE_RELEASE_DELAY = 0
+        thumbnail = review_storage.save(
+            "reviews/thumbnails/small.jpg", ContentFile(b"thumbnail")
+        )
+        ReviewUpload.objects.create(
+            review=review,
+            filename="small.gif",
+            content_type="image/gif",
+            size=len(SMALL_GIF),
+            thumbnail=thumbnail,
+        )
+        url = reverse(REVIEW_DETAIL_URL, args=[event.id, review.id])
+        with django_capture_on_commit_callbacks(execute=True):
+            not_moderator_client.delete(url)
+        assert not review_storage.exists(thumbnail), (
+            "Проверьте, что превью удаляется вместе с отзывом"
+        )
+
+    def test_thumbnail_error_keeps_review_file(self, review, monkeypatch):
+        """
+        Если превью не построилось, отзыв остается со старым файлом
+        """
+        file_name = review.file.name
+        create_processing_upload(review, content=b"new content")
+
+        def fail(upload, path):
+            raise OSError("Ошибка превью")
+
+        monkeypatch.setattr(uploads, "make_thumbnail", fail)
+        process_review_uploads()
+        upload = ReviewUpload.objects.get()
+        assert upload.status == ReviewUpload.STATUS.REJECTED
+        assert not upload.thumbnail
+        review.refresh_from_db()
+        assert review.file.name == file_name, (
+            "Проверьте, что файл отзыва не меняется, если превью не построилось"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_files_processed_outside_transaction(self, review, monkeypatch):
+        """
+        Файлы обрабатываются вне транзакции, результат каждой загрузки
+        сохраняется отдельно
+        """
+        create_processing_upload(review)
+        in_transaction = []
+        process_upload = uploads.process_upload
+
+        def process(upload):
+            in_transaction.append(connection.in_atomic_block)
+            locked_until = ReviewUpload.objects.get(id=upload.id).locked_until
+            assert locked_until > timezone.now()
+            return process_upload(upload)
+
+        monkeypatch.setattr(uploads, "process_upload", process)
+        assert process_review_uploads() == 1
+        assert in_transaction == [False], (
+            "Проверьте, что транзакция не открыта во время обработки файла"
+        )
+        upload = ReviewUpload.objects.get()
+        assert upload.status == ReviewUpload.STATUS.READY
+        assert upload.locked_until is None
+
+    @pytest.mark.parametrize("locked_for, processed", [(60, 0), (-60, 1)])
+    def test_claimed_upload_skipped(self, review, locked_for, processed):
+        """
+        Загрузку, закрепленную за другим воркером, берут только после
+        истечения срока
+        """
+        create_processing_upload(
+            review, locked_until=timezone.now() + timedelta(seconds=locked_for)
+        )
+        assert process_review_uploads() == processed
@@ -0,0 +1,138 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+EVENT_LIST_URL = reverse("event-list")
+EVENT_DETAIL_URL = "event-detail"
+REVIEW_LIST_URL = "reviews-list"
+USER_LIST_URL = reverse("user-list")
+
+pytestmark = pytest.mark.django_db
+
+
+def is_selected(context, column):
+    return any(f'."{column}"' in query["sql"] for query in context.captured_queries)
+
+
+class TestSparseFields:
+    @pytest.mark.parametrize(
+        "query, fields",
+        [
+            ("fields=id,title,start_at", {"id", "title", "start_at"}),
+            (
+                "exclude=description",
+                {
+                    "id",
+                    "title",
+                    "type",
+                    "address",
+                    "start_at",
+                    "capacity",
+                    "participants_count",
+                    "reviews_count",
+                    "last_review_at",
+                    "user",
+                },
+            ),
+        ],
+    )
+    def test_event_list(self, guest_client, event, query, fields):
+        """
+        Список событий содержит только запрошенные поля, description не
+        выбирается из БД
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get(f"{EVENT_LIST_URL}?{query}")
+        assert response.status_code == 200
+        assert set(response.json()["results"][0]) == fields, (
+            f"Проверьте, что при GET запросе {EVENT_LIST_URL}?{query} "
+            f"возвращаются только поля {fields}"
+        )
+        assert not is_selected(context, "description"), (
+            "Проверьте, что столбец description не выбирается из БД"
+        )
+
+    def test_event_list_without_description(self, guest_client, event):
+        """
+        Без выбора полей description возвращается и выбирается из БД
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get(EVENT_LIST_URL)
+        assert "description" in response.json()["results"][0]
+        assert is_selected(context, "description")
+
+    def test_event_list_cursor(self, guest_client, event, event_2):
+        """
+        Курсор строится по полям сортировки, даже если их нет в ответе
+        """
+        first = guest_client.get(f"{EVENT_LIST_URL}?fields=title&limit=1").json()
+        second = guest_client.get(first["next"]).json()
+        assert first["results"] + second["results"] == [
+            {"title": event_2.title},
+            {"title": event.title},
+        ], "Проверьте, что курсор следующей страницы работает с ?fields="
+
+    def test_event_detail_author(self, moderator_client, event):
+        """
+        Автор события получает только запрошенные поля, список участников
+        и description не выбираются из БД
+        """
+        url = reverse(EVENT_DETAIL_URL, args=[event.id])
+        with CaptureQueriesContext(connection) as context:
+            response = moderator_client.get(f"{url}?fields=id,title")
+        assert response.json() == {"id": event.id, "title": event.title}
+        assert not is_selected(context, "description")
+        assert not is_selected(context, "username"), (
+            "Проверьте, что участники не выбираются, если поле participant "
+            "не запрошено"
+        )
+
+    def test_review_list(self, guest_client, event, review):
+        """
+        Список отзывов содержит только запрошенные поля
+        """
+        url = reverse(REVIEW_LIST_URL, args=[event.id])
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get(f"{url}?exclude=text,file")
+        assert set(response.json()["results"][0]) == {
+            "id", "pub_date", "author", "event"
+        }
+        assert not is_selected(context, "text")
+
+    def test_user_list(self, moderator_client):
+        """
+        Список пользователей содержит только запрошенные поля, email не
+        выбирается из БД
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = moderator_client.get(f"{USER_LIST_URL}?fields=id,username")
+        assert set(response.json()["results"][0]) == {"id", "username"}
+        assert not is_selected(context, "email"), (
+            "Проверьте, что столбец email не выбирается из БД"
+        )
+
+    @pytest.mark.parametrize(
+        "query, param", [("fields=id,unknown", "fields"), ("exclude=text", "exclude")]
+    )
+    def test_unknown_fields(self, guest_client, event, query, param):
+        """
+        Неизвестное поле - ошибка 400
+        """
+        response = guest_client.get(f"{EVENT_LIST_URL}?{query}")
+        assert response.status_code == 400, (
+            f"Проверьте, что при GET запросе {EVENT_LIST_URL}?{query} "
+            f"возвращается статус 400"
+        )
+        assert param in response.json()
+
+    def test_write_ignores_fields(self, moderator_client, event):
+        """
+        Выбор полей не влияет на изменение события
+        """
+        url = reverse(EVENT_DETAIL_URL, args=[event.id])
+        response = moderator_client.patch(
+            f"{url}?fields=id", {"title": "new"}, format="json"
+        )
+        assert response.status_code == 200
+        assert response.json()["title"] == "new"
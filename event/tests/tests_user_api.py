@@ -1,7 +1,13 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from rest_framework.test import APIClient
+
+from conftest import NAME2, PASSWORD
 
 USER_LIST_URL = reverse("user-list")
+USER_LOGIN_URL = reverse("user-login")
 USER_DETAIL_URL = "user-detail"
 
 pytestmark = pytest.mark.django_db
@@ -102,3 +108,81 @@ class TestUserAPI:
             f"возвращается "
             f"статус {code}"
         )
+
+    def test_login_token(self, guest_client, not_moderator_user):
+        """
+        Токен выдается по имени и паролю и аутентифицирует запросы без
+        проверки пароля, смена пароля отзывает токен
+        """
+        response = guest_client.post(
+            USER_LOGIN_URL, data={"username": NAME2, "password": "wrong"}
+        )
+        assert response.status_code == 400
+        response = guest_client.post(
+            USER_LOGIN_URL, data={"username": NAME2, "password": PASSWORD}
+        )
+        assert response.status_code == 200, (
+            f"Проверьте, что при POST запросе {USER_LOGIN_URL} "
+            f"возвращается статус 200"
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+        url = reverse(USER_DETAIL_URL, args=[not_moderator_user.id])
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert len(context.captured_queries) == 2, (
+            f"Проверьте, что при GET запросе {url} с токеном пользователь "
+            f"выбирается одним запросом"
+        )
+        not_moderator_user.set_password("new_password")
+        not_moderator_user.save()
+        response = client.get(url)
+        assert response.status_code == 403
+        client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        response = client.get(url)
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize(
+        "user_client, method",
+        [
+            (pytest.lazy_fixture("moderator_client"), "get"),
+            (pytest.lazy_fixture("moderator_client"), "patch"),
+            (pytest.lazy_fixture("not_moderator_client"), "get"),
+            (pytest.lazy_fixture("not_moderator_client"), "patch"),
+        ],
+    )
+    def test_user_detail_single_user_query(
+        self, user_client, method, not_moderator_user
+    ):
+        """
+        Детальный запрос пользователя выполняет ровно один запрос к таблице
+        пользователей: права проверяются на уже выбранном объекте
+        """
+        url = reverse(USER_DETAIL_URL, args=[not_moderator_user.id])
+        with CaptureQueriesContext(connection) as context:
+            if method == "get":
+                response = user_client.get(url)
+            else:
+                response = user_client.patch(url, data={"email": "test2@test.ru"})
+        assert response.status_code == 200
+        user_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "event_user"' in query["sql"]
+        ]
+        assert len(user_queries) == 1, (
+            f"Проверьте, что при {method.upper()} запросе {url} пользователь "
+            f"запрашивается из БД ровно один раз"
+        )
+
+    def test_get_other_user_forbidden(self, not_moderator_client, user_1):
+        """
+        Не модератор не может просматривать информацию о другом пользователе
+        """
+        url = reverse(USER_DETAIL_URL, args=[user_1.id])
+        response = not_moderator_client.get(url)
+        assert response.status_code == 403, (
+            f"Проверьте, что при GET запросе {url} возвращается статус 403"
+        )
@@ -0,0 +1,310 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import ValidationError
+
+from event.models import Review, ReviewUpload
+from event.storage import review_storage
+
+# размер блока, которым тело запроса пишется на диск и читается при обработке
+STREAM_BLOCK_SIZE = 64 * 1024
+IMAGE_EXTENSIONS = ("jpg", "jpeg", "png", "gif")
+
+
+def get_extension(filename):
+    return os.path.splitext(filename)[1].lstrip(".").lower()
+
+
+def validate_review_file(filename, size):
+    """
+    Проверяет тип и размер файла отзыва до того, как он будет прочитан
+    """
+    if get_extension(filename) not in settings.REVIEW_FILE_EXTENSIONS:
+        raise ValidationError(
+            f"Допустимые типы файлов: {', '.join(settings.REVIEW_FILE_EXTENSIONS)}"
+        )
+    if size > settings.REVIEW_FILE_MAX_SIZE:
+        raise ValidationError(
+            f"Размер файла не должен превышать {settings.REVIEW_FILE_MAX_SIZE} байт"
+        )
+
+
+def get_part_path(upload):
+    return os.path.join(settings.REVIEW_UPLOAD_TEMP_DIR, f"{upload.id}.part")
+
+
+def discard_part(upload):
+    try:
+        os.remove(get_part_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def check_chunk(upload, offset, length):
+    """
+    Проверяет смещение и длину части до чтения тела запроса
+    """
+    if upload.status != ReviewUpload.STATUS.UPLOADING:
+        raise ValidationError("Файл уже загружен")
+    if offset != upload.offset:
+        raise ValidationError(
+            {"offset": upload.offset, "detail": "Неверное смещение части файла"}
+        )
+    if not 0 < length <= settings.REVIEW_UPLOAD_CHUNK_SIZE:
+        raise ValidationError(
+            f"Размер части должен быть от 1 до "
+            f"{settings.REVIEW_UPLOAD_CHUNK_SIZE} байт"
+        )
+    if offset + length > upload.size:
+        raise ValidationError("Часть выходит за пределы заявленного размера файла")
+
+
+def read_chunk(stream, length):
+    """
+    Читает часть файла из тела запроса во временный файл блоками по
+    STREAM_BLOCK_SIZE, не держа часть в памяти целиком. Вызывается до
+    блокировки загрузки, чтобы медленный клиент не держал транзакцию.
+    Возвращает путь к файлу части, удалить его должен вызывающий код
+    """
+    os.makedirs(settings.REVIEW_UPLOAD_TEMP_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=settings.REVIEW_UPLOAD_TEMP_DIR, suffix=".chunk", delete=False
+    ) as chunk:
+        try:
+            remaining = length
+            while remaining:
+                data = stream.read(min(remaining, STREAM_BLOCK_SIZE))
+                if not data:
+                    raise ValidationError("Тело запроса короче Content-Length")
+                chunk.write(data)
+                remaining -= len(data)
+        except BaseException:
+            chunk.close()
+            os.remove(chunk.name)
+            raise
+    return chunk.name
+
+
+def write_chunk(upload, chunk_path, offset, length):
+    """
+    Дописывает прочитанную часть во временный файл загрузки. Вызывается в
+    транзакции с заблокированной загрузкой, смещение проверяется повторно:
+    пока читалось тело, ту же часть мог записать параллельный запрос.
+    После обрыва загрузка продолжается с offset из ответа.
+    """
+    check_chunk(upload, offset, length)
+    path = get_part_path(upload)
+    with open(path, "r+b" if os.path.exists(path) else "wb") as part, open(
+        chunk_path, "rb"
+    ) as chunk:
+        # хвост от прерванной записи отбрасывается
+        part.truncate(offset)
+        part.seek(offset)
+        shutil.copyfileobj(chunk, part, STREAM_BLOCK_SIZE)
+    upload.offset = offset + length
+    if upload.offset == upload.size:
+        upload.status = ReviewUpload.STATUS.PROCESSING
+    upload.save(update_fields=["offset", "status"])
+    return upload
+
+
+def is_review_file_used(name):
+    """
+    Ссылается ли на файл отзыв или превью загрузки (поиск по индексам
+    Review.file и ReviewUpload.thumbnail)
+    """
+    return (
+        Review.objects.filter(file=name).exists()
+        or ReviewUpload.objects.filter(thumbnail=name).exists()
+    )
+
+
+def release_review_file(name):
+    """
+    Удаляет файл или превью из хранилища отзывов после коммита транзакции,
+    если на него больше не ссылаются. Файл, повторно использованный за
+    последние REVIEW_FILE_RELEASE_DELAY сек (параллельная загрузка того же
+    содержимого еще не закоммичена), остается до collect_review_files
+    """
+    if not name:
+        return
+
+    def release():
+        if not is_review_file_used(name):
+            review_storage.release(name, settings.REVIEW_FILE_RELEASE_DELAY)
+
+    transaction.on_commit(release)
+
+
+def get_unused_review_files(batch_size=1000):
+    """
+    Файлы хранилища отзывов, на которые не ссылается ни отзыв, ни превью.
+    Ссылки проверяются пачками по batch_size имен
+    """
+    location = review_storage.location
+    names = [
+        os.path.relpath(os.path.join(root, file), location).replace(os.sep, "/")
+        for root, _, files in os.walk(location)
+        for file in files
+    ]
+    for start in range(0, len(names), batch_size):
+        batch = names[start : start + batch_size]
+        used = set(
+            Review.objects.filter(file__in=batch).values_list("file", flat=True)
+        )
+        used.update(
+            ReviewUpload.objects.filter(thumbnail__in=batch).values_list(
+                "thumbnail", flat=True
+            )
+        )
+        yield from (name for name in batch if name not in used)
+
+
+def collect_review_files():
+    """
+    Удаляет файлы без ссылок, не использованные последние
+    REVIEW_FILE_RELEASE_DELAY сек. Возвращает кол-во удаленных файлов
+    """
+    return sum(
+        review_storage.release(name, settings.REVIEW_FILE_RELEASE_DELAY)
+        for name in get_unused_review_files()
+    )
+
+
+def get_checksum(path):
+    checksum = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(STREAM_BLOCK_SIZE), b""):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def scan_file(path):
+    """
+    Проверка на вирусы функцией из REVIEW_FILE_SCANNER
+    """
+    if not settings.REVIEW_FILE_SCANNER:
+        return True
+    return import_string(settings.REVIEW_FILE_SCANNER)(path)
+
+
+def make_thumbnail(upload, path):
+    """
+    Превью изображения из файла path, если установлен Pillow
+    """
+    if get_extension(upload.filename) not in IMAGE_EXTENSIONS:
+        return
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    size = settings.REVIEW_THUMBNAIL_SIZE
+    with Image.open(path) as image:
+        image.thumbnail((size, size))
+        content = io.BytesIO()
+        image.convert("RGB").save(content, format="JPEG")
+    name = f"{os.path.splitext(upload.filename)[0]}.jpg"
+    upload.thumbnail.save(name, ContentFile(content.getvalue()), save=False)
+
+
+def process_upload(upload):
+    """
+    Обработка файла загрузки без обращений к БД: контрольная сумма, проверка
+    на вирусы, превью и перенос файла в хранилище. Отзыв и загрузка
+    сохраняются в save_upload. Файлы в хранилище, на которые не сослались
+    (ошибка до сохранения), удаляет collect_review_files
+    """
+    path = get_part_path(upload)
+    upload.checksum = get_checksum(path)
+    if not scan_file(path):
+        upload.status = ReviewUpload.STATUS.REJECTED
+        upload.error = "Файл не прошел проверку на вирусы"
+        return
+    # превью строится до замены файла отзыва: если оно не получится, отзыв
+    # останется со старым файлом
+    make_thumbnail(upload, path)
+    review = upload.review
+    name = review_storage.get_content_name(
+        review.file.field.generate_filename(review, upload.filename),
+        upload.checksum,
+    )
+    if review_storage.touch(name):
+        # такой файл уже есть в хранилище, копировать его не нужно
+        review.file.name = name
+    else:
+        with open(path, "rb") as file:
+            review.file.save(upload.filename, File(file), save=False)
+    upload.status = ReviewUpload.STATUS.READY
+
+
+def claim_uploads(batch_size):
+    """
+    Закрепляет за воркером пачку полностью загруженных файлов на
+    REVIEW_UPLOAD_PROCESS_TIMEOUT сек. Строки блокируются только на время
+    этой короткой транзакции
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        uploads = list(
+            ReviewUpload.objects.filter(
+                Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+                status=ReviewUpload.STATUS.PROCESSING,
+            )
+            .select_for_update(skip_locked=True, of=("self",))
+            .select_related("review")[:batch_size]
+        )
+        locked_until = now + timedelta(seconds=settings.REVIEW_UPLOAD_PROCESS_TIMEOUT)
+        ReviewUpload.objects.filter(id__in=[upload.id for upload in uploads]).update(
+            locked_until=locked_until
+        )
+    return uploads
+
+
+def save_upload(upload, previous):
+    """
+    Сохраняет результат обработки: файл отзыва и загрузку (статус, превью)
+    в одной транзакции. Прежний файл отзыва освобождается после коммита
+    """
+    upload.processed_at = timezone.now()
+    upload.locked_until = None
+    with transaction.atomic():
+        if upload.status == ReviewUpload.STATUS.READY:
+            review = upload.review
+            review.save(update_fields=["file"])
+            if previous != review.file.name:
+                release_review_file(previous)
+        upload.save()
+
+
+def process_review_uploads(batch_size=None):
+    """
+    Обрабатывает пачку полностью загруженных файлов отзывов: считает
+    контрольную сумму, проверяет на вирусы, строит превью и переносит файл
+    в хранилище. Файлы обрабатываются вне транзакции, результат каждой
+    загрузки сохраняется отдельно. Ошибка обработки помечает загрузку как
+    REJECTED. Возвращает кол-во обработанных загрузок.
+    """
+    uploads = claim_uploads(batch_size or settings.REVIEW_UPLOAD_BATCH_SIZE)
+    for upload in uploads:
+        previous = upload.review.file.name
+        try:
+            process_upload(upload)
+        except Exception as error:
+            upload.review.file.name = previous
+            upload.thumbnail.name = ""
+            upload.status = ReviewUpload.STATUS.REJECTED
+            upload.error = str(error)
+        save_upload(upload, previous)
+        discard_part(upload)
+    return len(uploads)
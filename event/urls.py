@@ -1,8 +1,10 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (EventViewSet, ReviewViewSet, UserViewSet,
-                    get_registration_to_event, get_users_events)
+from .async_views import async_view
+from .views import (EventViewSet, ReviewViewSet, UserEventsView, UserViewSet,
+                    bulk_registration_to_event, get_cache_stats,
+                    get_registration_to_event, metrics, review_file)
 
 router = routers.DefaultRouter()
 router.register(r"auth/user", UserViewSet, basename="user")
@@ -12,7 +14,15 @@ router.register(r"event/(?P<event_id>\d+)/reviews", ReviewViewSet, basename="rev
 
 extra_patterns = [
     path("", include(router.urls)),
-    path("my_events/", get_users_events, name="my_events"),
+    path("my_events/", async_view(UserEventsView.as_view()), name="my_events"),
+    path("event_cache_stats/", get_cache_stats, name="event_cache_stats"),
+    path("metrics/", metrics, name="metrics"),
+    path("review_files/<path:name>", review_file, name="review_file"),
+    path(
+        "event_registration/",
+        bulk_registration_to_event,
+        name="event_bulk_registration",
+    ),
     path(
         "event_registration/<int:event_id>/",
         get_registration_to_event,
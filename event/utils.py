@@ -1,24 +1,307 @@
-from django.core.mail import EmailMessage
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.template.loader import render_to_string
+from django.utils import timezone
+
+from event.cache import invalidate_event_cache
+from event.models import Event, EventParticipant, Notification, Review
+from event.profiling import timed
+
+REVIEW_STATS_FIELDS = ("reviews_count", "last_review_at")
 
 
-def send_email(event, email, review=None):
+def queue_email(event, email, review=None):
+    """
+    Ставит уведомление организатору в очередь. Вызывается в той же
+    транзакции, что и создание заявки/отзыва, само письмо отправляет
+    воркер (manage.py send_notifications).
+    """
+    kind = Notification.KIND.REVIEW if review else Notification.KIND.REGISTRATION
+    return Notification.objects.create(event=event, email=email, kind=kind)
+
+
+def queue_emails(registrations):
+    """
+    Ставит в очередь уведомления о новых заявках одним запросом: одно
+    уведомление на событие, заявки нескольких участников события
+    объединяются в одно сводное уведомление независимо от режима сводки.
+    registrations - пары (id события, email участника).
+    """
+    events = {}
+    for event_id, email in registrations:
+        events.setdefault(event_id, []).append(email)
+    return Notification.objects.bulk_create(
+        Notification(
+            event_id=event_id,
+            email=emails[0] if len(emails) == 1 else "",
+            emails=emails if len(emails) > 1 else [],
+            kind=Notification.KIND.REGISTRATION,
+        )
+        for event_id, emails in events.items()
+    )
+
+
+def build_email(notifications):
+    """
+    Собирает одно письмо организатору по уведомлениям одного события.
+    Несколько уведомлений (режим сводки) объединяются в одно письмо.
+    """
+    event = notifications[0].event
     message = {
         "event": event.title,
         "date": event.start_at,
-        "email": email,
     }
-    if review:
+    if len(notifications) > 1:
+        message["registrations"] = [
+            email
+            for notification in notifications
+            if notification.kind == Notification.KIND.REGISTRATION
+            for email in notification.recipients
+        ]
+        message["reviews"] = [
+            email
+            for notification in notifications
+            if notification.kind == Notification.KIND.REVIEW
+            for email in notification.recipients
+        ]
+        message["message"] = "Новые заявки и отзывы на событие"
+        subject = f"Сводка по событию: {event.title}"
+    elif notifications[0].emails:
+        message["registrations"] = notifications[0].emails
+        message["message"] = "Поступили новые заявки на участие!"
+        subject = "Новые заявки на событие"
+    elif notifications[0].kind == Notification.KIND.REVIEW:
+        message["email"] = notifications[0].email
         message["message"] = "Поступил новый отзыв на событие!"
         subject = "Новый отзыв на событие"
     else:
+        message["email"] = notifications[0].email
         message["message"] = "Поступила новая заявка на участие!"
         subject = "Новая заявка на событие"
-    html_message = render_to_string("email.html", message)
+    with timed("template"):
+        html_message = render_to_string("email.html", message)
     message = EmailMessage(
         subject,
         html_message,
         to=[event.user.email],
     )
     message.content_subtype = "html"
-    message.send()
+    return message
+
+
+def get_retry_delay(attempts):
+    return timedelta(seconds=settings.NOTIFICATION_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def get_pending_notifications(batch_size):
+    """
+    Блокирует и возвращает пачку уведомлений, готовых к отправке.
+    В режиме сводки (NOTIFICATION_DIGEST_WINDOW > 0) берутся события,
+    самое старое уведомление которых ждет дольше окна, и все их
+    накопившиеся уведомления.
+    """
+    now = timezone.now()
+    queue = Notification.objects.filter(
+        status=Notification.STATUS.PENDING, send_after__lte=now
+    )
+    window = settings.NOTIFICATION_DIGEST_WINDOW
+    if window:
+        events = (
+            queue.filter(send_after__lte=now - timedelta(seconds=window))
+            .order_by()
+            .values("event_id")
+            .distinct()[:batch_size]
+        )
+        queue = queue.filter(event_id__in=events)
+    else:
+        queue = queue.order_by("send_after")[:batch_size]
+    return list(
+        queue.select_for_update(skip_locked=True, of=("self",)).select_related(
+            "event__user"
+        )
+    )
+
+
+def mark_sent(notifications, now):
+    for notification in notifications:
+        notification.attempts += 1
+        notification.status = Notification.STATUS.SENT
+        notification.sent_at = now
+
+
+def mark_failed(notifications, error, now):
+    for notification in notifications:
+        notification.attempts += 1
+        notification.error = str(error)
+        if notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            notification.status = Notification.STATUS.FAILED
+        else:
+            notification.send_after = now + get_retry_delay(notification.attempts)
+
+
+def send_queued_emails(batch_size=None):
+    """
+    Отправляет одну пачку уведомлений из очереди через одно соединение
+    с почтовым сервером. В режиме сводки уведомления одного события
+    объединяются в одно письмо. Неудачные отправки откладываются с
+    экспоненциальной задержкой, после NOTIFICATION_MAX_ATTEMPTS попыток
+    уведомление помечается как FAILED. Пачка закрепляется за воркером в
+    короткой транзакции, письма отправляются вне транзакции: медленный
+    почтовый сервер не держит блокировки. Возвращает кол-во обработанных
+    уведомлений.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        notifications = get_pending_notifications(batch_size)
+        if not notifications:
+            return 0
+        # другие воркеры не возьмут пачку до конца отправки, а если воркер
+        # упадет - возьмут после NOTIFICATION_SEND_TIMEOUT
+        Notification.objects.filter(
+            pk__in=[notification.pk for notification in notifications]
+        ).update(send_after=now + timedelta(seconds=settings.NOTIFICATION_SEND_TIMEOUT))
+    groups = {}
+    for notification in notifications:
+        if settings.NOTIFICATION_DIGEST_WINDOW:
+            key = notification.event_id
+        else:
+            key = notification.pk
+        groups.setdefault(key, []).append(notification)
+    with get_connection() as connection:
+        for group in groups.values():
+            try:
+                connection.send_messages([build_email(group)])
+            except Exception as error:
+                mark_failed(group, error, now)
+            else:
+                mark_sent(group, now)
+    with transaction.atomic():
+        Notification.objects.bulk_update(
+            notifications, ["status", "attempts", "send_after", "error", "sent_at"]
+        )
+    return len(notifications)
+
+
+def get_review_stats():
+    """
+    Подзапросы фактических кол-ва отзывов и даты последнего отзыва события,
+    последний отзыв выбирается по индексу review_event_pub_date_idx
+    """
+    reviews = Review.objects.filter(event=OuterRef("pk")).order_by()
+    return {
+        "reviews_count": Coalesce(
+            Subquery(
+                reviews.values("event").annotate(count=Count("id")).values("count")
+            ),
+            0,
+        ),
+        "last_review_at": Subquery(
+            reviews.order_by("-pub_date").values("pub_date")[:1]
+        ),
+    }
+
+
+def add_review(review):
+    """
+    Учитывает новый отзыв в статистике события без пересчета отзывов.
+    Вызывается в той же транзакции, что и создание отзыва.
+    """
+    pub_date = Value(review.pub_date)
+    Event.objects.filter(id=review.event_id).update(
+        reviews_count=F("reviews_count") + 1,
+        last_review_at=Greatest(Coalesce("last_review_at", pub_date), pub_date),
+    )
+
+
+def remove_review(review):
+    """
+    Учитывает удаление отзыва в статистике события. Вызывается в той же
+    транзакции после удаления отзыва.
+    """
+    Event.objects.filter(id=review.event_id).update(
+        reviews_count=Greatest(F("reviews_count") - 1, 0),
+        last_review_at=get_review_stats()["last_review_at"],
+    )
+
+
+def recompute_review_stats(events=None):
+    """
+    Пересчитывает статистику отзывов событий одним UPDATE и сбрасывает
+    кэш событий. Возвращает кол-во обновленных событий.
+    """
+    if events is None:
+        events = Event.objects.all()
+    updated = events.update(**get_review_stats())
+    invalidate_event_cache()
+    return updated
+
+
+def get_inconsistent_review_stats():
+    """
+    Возвращает id событий, сохраненная статистика отзывов которых
+    расходится с фактической
+    """
+    events = (
+        Event.objects.annotate(
+            **{f"actual_{name}": stat for name, stat in get_review_stats().items()}
+        )
+        .order_by("id")
+        .values_list(
+            "id",
+            *REVIEW_STATS_FIELDS,
+            *(f"actual_{name}" for name in REVIEW_STATS_FIELDS),
+        )
+    )
+    size = len(REVIEW_STATS_FIELDS)
+    return [
+        event_id
+        for event_id, *stats in events.iterator()
+        if stats[:size] != stats[size:]
+    ]
+
+
+def get_participants_count():
+    """
+    Подзапрос фактического кол-ва участников события
+    """
+    return Coalesce(
+        Subquery(
+            EventParticipant.objects.filter(event=OuterRef("pk"))
+            .order_by()
+            .values("event")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def recompute_participants_count(events=None):
+    """
+    Пересчитывает счетчики участников событий одним UPDATE и сбрасывает
+    кэш событий. Возвращает кол-во обновленных событий.
+    """
+    if events is None:
+        events = Event.objects.all()
+    updated = events.update(participants_count=get_participants_count())
+    invalidate_event_cache()
+    return updated
+
+
+def get_inconsistent_participants_count():
+    """
+    Возвращает id событий, счетчик участников которых расходится с
+    фактическим кол-вом заявок
+    """
+    return list(
+        Event.objects.annotate(actual_participants_count=get_participants_count())
+        .exclude(participants_count=F("actual_participants_count"))
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
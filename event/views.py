@@ -1,82 +1,522 @@
+import os
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.http import HttpResponse
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.generics import get_object_or_404
+from rest_framework.decorators import (action, api_view,
+                                       authentication_classes,
+                                       permission_classes)
+from rest_framework.generics import ListAPIView, get_object_or_404
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from event.models import Event, EventParticipant
-from event.permissions import (IsModeratorOrRead, IsNotModerator,
+from event.async_views import AsyncViewSetMixin
+from event.authentication import make_token
+from event.cache import (EventCacheMixin, get_event_cache_stats,
+                         invalidate_event_cache)
+from event.converters import ValuesListMixin
+from event.export import REVIEW_EXPORT_FIELDS, export_response
+from event.fieldsets import SparseFieldsMixin
+from event.filters import EventFilter, UserEventFilter
+from event.importer import import_events
+from event.models import Event, EventParticipant, Review, ReviewUpload
+from event.permissions import (HasMetricsToken, IsEventAuthor, IsModerator,
+                               IsModeratorOrRead, IsNotModerator,
                                IsOwnerOrModeratorOrCreate, PermissionForReview)
-from event.serializers import (EventModeratorSerializer, EventSerializer,
-                               ReviewSerializer, UserSerializer)
-from event.utils import send_email
+from event.profiling import get_metrics
+from event.serializers import (PARTICIPANT_FIELDS, BulkParticipantsSerializer,
+                               BulkRegistrationSerializer,
+                               EventImportSerializer, EventModeratorSerializer,
+                               EventSerializer, LoginSerializer,
+                               ReviewSerializer, ReviewUploadSerializer,
+                               UserSerializer, get_participants)
+from event.uploads import (check_chunk, discard_part, is_review_file_used,
+                           read_chunk, release_review_file, write_chunk)
+from event.utils import add_review, queue_email, queue_emails, remove_review
 
 User = get_user_model()
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(SparseFieldsMixin, ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsOwnerOrModeratorOrCreate,)
+    ordering = ("id",)
+
+    def get_serializer_class(self):
+        if self.action == "login":
+            return LoginSerializer
+        return UserSerializer
+
+    @action(detail=False, methods=["post"], permission_classes=[AllowAny])
+    def login(self, request):
+        """
+        Выдает токен для заголовка "Authorization: Token <токен>"
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            {"token": make_token(serializer.validated_data["user"])},
+            status=status.HTTP_200_OK,
+        )
 
 
-class EventViewSet(ModelViewSet):
+class EventViewSet(
+    AsyncViewSetMixin, EventCacheMixin, SparseFieldsMixin, ValuesListMixin, ModelViewSet
+):
     queryset = Event.objects.all()
+    async_actions = ("list", "retrieve")
+    # автор нужен для выбора сериализатора и проверки прав
+    required_fields = ("id", "user")
     permission_classes = (IsModeratorOrRead,)
-    filterset_fields = ["title", "start_at", "description", "address", "type"]
+    filterset_class = EventFilter
+    ordering = ("start_at", "id")
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def get_object(self):
+        """
+        Событие запрашивается один раз за запрос и переиспользуется при
+        выборе сериализатора
+        """
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
     def get_serializer_class(self, *args, **kwargs):
-        if "pk" in self.kwargs:
-            event = get_object_or_404(Event, id=self.kwargs["pk"])
-            if self.request.user == event.user:
-                return EventModeratorSerializer
+        if self.action == "participants":
+            return UserSerializer
+        if self.action in ("add_participants", "remove_participants"):
+            return BulkParticipantsSerializer
+        if self.action == "bulk_import":
+            return EventImportSerializer
+        if getattr(self, "swagger_fake_view", False):
+            return EventSerializer
+        if "pk" in self.kwargs and self.get_object().user_id == self.request.user.id:
+            return EventModeratorSerializer
         return EventSerializer
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[IsModerator],
+        parser_classes=[MultiPartParser],
+    )
+    def bulk_import(self, request):
+        """
+        Модератор импортирует события из файла CSV или NDJSON, автором
+        событий становится он сам. Ошибочные строки не прерывают импорт и
+        возвращаются в errors с номером строки
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        file = serializer.validated_data["file"]
+        return Response(
+            import_events(file, file.name, request.user), status=status.HTTP_200_OK
+        )
 
-@api_view(["GET"])
-@permission_classes([IsNotModerator])
-def get_users_events(request):
-    events_id = EventParticipant.objects.filter(user=request.user).values_list(
-        "event", flat=True
+    @action(detail=True, permission_classes=[IsEventAuthor])
+    def participants(self, request, pk=None):
+        page = self.paginate_queryset(get_participants(self.get_object()))
+        serializer = UserSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=True, url_path="export/participants", permission_classes=[IsEventAuthor]
     )
-    events = Event.objects.filter(id__in=events_id)
-    serializer = EventSerializer(events, many=True)
-    return Response(serializer.data)
+    def export_participants(self, request, pk=None):
+        """
+        Потоковая выгрузка участников события в CSV или NDJSON (?output=ndjson)
+        """
+        event = self.get_object()
+        return export_response(
+            request,
+            get_participants(event),
+            PARTICIPANT_FIELDS,
+            f"event_{event.id}_participants",
+        )
 
+    @action(detail=True, url_path="export/reviews", permission_classes=[IsEventAuthor])
+    def export_reviews(self, request, pk=None):
+        """
+        Потоковая выгрузка отзывов о событии в CSV или NDJSON (?output=ndjson)
+        """
+        event = self.get_object()
+        return export_response(
+            request,
+            event.reviews.order_by("id"),
+            REVIEW_EXPORT_FIELDS,
+            f"event_{event.id}_reviews",
+        )
 
-class ReviewViewSet(ModelViewSet):
+    @participants.mapping.post
+    def add_participants(self, request, pk=None):
+        """
+        Автор события регистрирует на него список пользователей
+        """
+        event = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = set(serializer.validated_data["users"])
+        with transaction.atomic():
+            event = Event.objects.select_for_update().get(id=event.id)
+            users = dict(
+                User.objects.filter(id__in=user_ids, is_moderator=False).values_list(
+                    "id", "email"
+                )
+            )
+            existing = set(
+                event.event_participants.filter(user__in=users)
+                .order_by()
+                .values_list("user_id", flat=True)
+            )
+            new_users = sorted(users.keys() - existing)
+            if event.capacity is None:
+                created, no_seats = new_users, []
+            else:
+                seats = max(event.capacity - event.participants_count, 0)
+                created, no_seats = new_users[:seats], new_users[seats:]
+            EventParticipant.objects.bulk_create(
+                [EventParticipant(event=event, user_id=user_id) for user_id in created],
+                ignore_conflicts=True,
+            )
+            Event.objects.filter(id=event.id).update(
+                participants_count=F("participants_count") + len(created)
+            )
+            queue_emails((event.id, users[user_id]) for user_id in created)
+            invalidate_event_cache([event.id])
+        return Response(
+            {
+                "status": "Заявки на участие в мероприятии созданы",
+                "users": created,
+                "not_found": sorted(user_ids - users.keys()),
+                "no_seats": no_seats,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @participants.mapping.delete
+    def remove_participants(self, request, pk=None):
+        """
+        Автор события удаляет заявки списка пользователей
+        """
+        event = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            deleted, _ = event.event_participants.filter(
+                user__in=serializer.validated_data["users"]
+            ).delete()
+            Event.objects.filter(id=event.id).update(
+                participants_count=Greatest(F("participants_count") - deleted, 0)
+            )
+            invalidate_event_cache([event.id])
+        return Response(
+            {"status": "Заявки на участие в мероприятии удалены", "count": deleted},
+            status=status.HTTP_200_OK,
+        )
+
+
+class UserEventsView(ValuesListMixin, ListAPIView):
+    """
+    События, на которые подана заявка текущего пользователя.
+    Выбираются одним JOIN с заявками по индексу unique_participant
+    (user_id, event_id)
+    """
+
+    serializer_class = EventSerializer
+    permission_classes = (IsNotModerator,)
+    filterset_class = UserEventFilter
+    ordering = ("start_at", "id")
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Event.objects.none()
+        return Event.objects.filter(event_participants__user=self.request.user)
+
+
+class ReviewViewSet(
+    AsyncViewSetMixin, SparseFieldsMixin, ValuesListMixin, ModelViewSet
+):
     serializer_class = ReviewSerializer
+    async_actions = ("list",)
+    required_fields = ("id", "author", "event")
     permission_classes = (PermissionForReview,)
+    ordering = ("-pub_date", "id")
 
     def get_queryset(self):
+        if "pk" in self.kwargs:
+            # отзыв выбирается одним запросом вместе с проверкой события
+            return Review.objects.filter(event_id=self.kwargs.get("event_id"))
         event = get_object_or_404(Event, id=self.kwargs.get("event_id"))
         return event.reviews.all()
 
     def perform_create(self, serializer):
         event = get_object_or_404(Event, id=self.kwargs.get("event_id"))
-        serializer.save(event=event, author=self.request.user)
-        send_email(event, self.request.user.email, review=True)
+        with transaction.atomic():
+            review = serializer.save(event=event, author=self.request.user)
+            add_review(review)
+            queue_email(event, self.request.user.email, review=True)
+            invalidate_event_cache([event.id])
+
+    def perform_update(self, serializer):
+        previous = serializer.instance.file.name
+        review = serializer.save()
+        if previous != review.file.name:
+            release_review_file(previous)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            remove_review(instance)
+            invalidate_event_cache([instance.event_id])
+
+    def get_serializer_class(self):
+        if self.action in ("attachment", "start_attachment", "upload_attachment"):
+            return ReviewUploadSerializer
+        return ReviewSerializer
+
+    @action(detail=True)
+    def attachment(self, request, event_id=None, pk=None):
+        """
+        Состояние загрузки файла отзыва: offset для продолжения загрузки,
+        статус обработки, контрольная сумма и превью
+        """
+        upload = get_object_or_404(ReviewUpload, review=self.get_object())
+        return Response(self.get_serializer(upload).data)
+
+    @attachment.mapping.post
+    def start_attachment(self, request, event_id=None, pk=None):
+        """
+        Начинает загрузку файла отзыва по частям. Тип и размер файла
+        проверяются до загрузки содержимого, прежняя незавершенная загрузка
+        отменяется
+        """
+        review = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            for upload in ReviewUpload.objects.select_for_update().filter(
+                review=review
+            ):
+                discard_part(upload)
+                upload.delete()
+            serializer.save(review=review)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @attachment.mapping.put
+    def upload_attachment(self, request, event_id=None, pk=None):
+        """
+        Дописывает часть файла: тело запроса - байты части, заголовок
+        Upload-Offset - смещение части в файле. После последней части файл
+        обрабатывается воркером (manage.py process_review_uploads)
+        """
+        review = self.get_object()
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.headers.get("Content-Length", ""))
+        except ValueError:
+            return Response(
+                {"detail": "Требуются заголовки Upload-Offset и Content-Length"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        check_chunk(get_object_or_404(ReviewUpload, review=review), offset, length)
+        # тело читается до блокировки загрузки
+        chunk_path = read_chunk(request.stream, length)
+        try:
+            with transaction.atomic():
+                upload = get_object_or_404(
+                    ReviewUpload.objects.select_for_update(), review=review
+                )
+                write_chunk(upload, chunk_path, offset, length)
+        finally:
+            os.remove(chunk_path)
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, url_path="file")
+    def download(self, request, event_id=None, pk=None):
+        """
+        Файл отзыва отдает nginx по X-Accel-Redirect, Django не читает файл
+        """
+        review = self.get_object()
+        if not review.file:
+            return Response(
+                {"detail": "У отзыва нет файла"}, status=status.HTTP_404_NOT_FOUND
+            )
+        response = protected_file_response(review.file.name)
+        response["Content-Disposition"] = (
+            f'attachment; filename="{os.path.basename(review.file.name)}"'
+        )
+        return response
+
+
+def protected_file_response(name):
+    """
+    Пустой ответ, файл из хранилища отзывов отдает nginx по X-Accel-Redirect
+    """
+    response = HttpResponse()
+    # тип файла nginx определит по расширению
+    del response["Content-Type"]
+    response["X-Accel-Redirect"] = f"{settings.PROTECTED_MEDIA_URL}{name}"
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def review_file(request, name):
+    """
+    Файл или превью отзыва по ссылке из API (REVIEW_MEDIA_URL). Отдаются
+    только файлы, на которые ссылается отзыв или загрузка
+    """
+    if not is_review_file_used(name):
+        return Response({"detail": "Файл не найден"}, status=status.HTTP_404_NOT_FOUND)
+    return protected_file_response(name)
 
 
 @api_view(["POST"])
 @permission_classes([IsNotModerator])
 def get_registration_to_event(request, event_id):
-    if EventParticipant.objects.filter(user=request.user, event=event_id).exists():
-        event = EventParticipant.objects.get(user=request.user, event=event_id)
-        event.delete()
+    """
+    Переключает заявку на участие: удаляет существующую или создает новую.
+    Повторная заявка из параллельного запроса не приводит к ошибке.
+    """
+    with transaction.atomic():
+        deleted, _ = EventParticipant.objects.filter(
+            user=request.user, event=event_id
+        ).delete()
+        if deleted:
+            Event.objects.filter(id=event_id).update(
+                participants_count=Greatest(F("participants_count") - 1, 0)
+            )
+            invalidate_event_cache([event_id])
+    if deleted:
         return Response(
-            {"status": "Заявка на участие в мероприятии удалена"},
+            {"status": "Заявка на участие в мероприятии удалена", "registered": False},
             status=status.HTTP_200_OK,
         )
-    else:
-        event = get_object_or_404(Event, id=event_id)
-        EventParticipant.objects.create(event=event, user=request.user)
-        send_email(event, request.user.email)
+    try:
+        with transaction.atomic():
+            # условный UPDATE блокирует строку события, поэтому параллельные
+            # заявки на одно событие не превысят кол-во мест
+            booked = (
+                Event.objects.filter(id=event_id)
+                .filter(Q(capacity=None) | Q(participants_count__lt=F("capacity")))
+                .update(participants_count=F("participants_count") + 1)
+            )
+            if booked:
+                EventParticipant.objects.create(event_id=event_id, user=request.user)
+                queue_emails([(event_id, request.user.email)])
+                invalidate_event_cache([event_id])
+    except IntegrityError:
+        # заявку уже создал параллельный запрос этого пользователя
+        booked = True
+    if not booked:
+        get_object_or_404(Event.objects.only("id"), id=event_id)
+        return Response(
+            {"status": "Свободных мест на мероприятие нет", "registered": False},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(
+        {"status": "Заявка на участие в мероприятии создана", "registered": True},
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["POST", "DELETE"])
+@permission_classes([IsNotModerator])
+def bulk_registration_to_event(request):
+    """
+    Создает (POST) или удаляет (DELETE) заявки текущего пользователя на
+    список событий
+    """
+    serializer = BulkRegistrationSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    event_ids = set(serializer.validated_data["events"])
+    if request.method == "DELETE":
+        with transaction.atomic():
+            participants = EventParticipant.objects.filter(
+                user=request.user, event__in=event_ids
+            )
+            registered = list(
+                participants.select_for_update()
+                .order_by()
+                .values_list("event_id", flat=True)
+            )
+            deleted, _ = participants.filter(event__in=registered).delete()
+            Event.objects.filter(id__in=registered).update(
+                participants_count=Greatest(F("participants_count") - 1, 0)
+            )
+            invalidate_event_cache(registered)
         return Response(
-            {"status": "Заявка на участие в мероприятии создана"},
+            {"status": "Заявки на участие в мероприятиях удалены", "count": deleted},
             status=status.HTTP_200_OK,
         )
+    with transaction.atomic():
+        events = list(
+            Event.objects.select_for_update()
+            .filter(id__in=event_ids)
+            .only("id", "capacity", "participants_count")
+            .order_by("id")
+        )
+        existing = set(
+            EventParticipant.objects.filter(user=request.user, event__in=events)
+            .order_by()
+            .values_list("event_id", flat=True)
+        )
+        created, no_seats = [], []
+        for event in events:
+            if event.id in existing:
+                continue
+            if event.capacity is None or event.participants_count < event.capacity:
+                created.append(event.id)
+            else:
+                no_seats.append(event.id)
+        EventParticipant.objects.bulk_create(
+            [
+                EventParticipant(event_id=event_id, user=request.user)
+                for event_id in created
+            ],
+            ignore_conflicts=True,
+        )
+        Event.objects.filter(id__in=created).update(
+            participants_count=F("participants_count") + 1
+        )
+        queue_emails((event_id, request.user.email) for event_id in created)
+        invalidate_event_cache(created)
+    return Response(
+        {
+            "status": "Заявки на участие в мероприятиях созданы",
+            "events": created,
+            "not_found": sorted(event_ids - {event.id for event in events}),
+            "no_seats": no_seats,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsModerator])
+def get_cache_stats(request):
+    """
+    Кол-во попаданий и промахов кэша списка и карточек событий
+    """
+    return Response(get_event_cache_stats())
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([HasMetricsToken])
+def metrics(request):
+    """
+    Метрики замеренных запросов в текстовом формате Prometheus, доступны
+    по токену сборщика метрик
+    """
+    return HttpResponse(get_metrics(), content_type="text/plain; version=0.0.4")
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_alente.settings.settings_dev')
 
-application = get_asgi_application()
+# как get_asgi_application, но с обработчиком, отдающим потоковые ответы
+# (выгрузки) без запросов к БД из event loop
+django.setup(set_prefix=False)
+
+from event.asgi import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
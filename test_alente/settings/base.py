@@ -24,6 +24,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # включается PROFILING_ENABLED
+    "event.profiling.ProfilingMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -96,13 +98,117 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        # первым остается SessionAuthentication: без заголовка
+        # WWW-Authenticate неаутентифицированный запрос получает 403
+        "rest_framework.authentication.SessionAuthentication",
+        "event.authentication.SignedTokenAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    # JSON кодируется orjson, если он установлен
+    "DEFAULT_RENDERER_CLASSES": [
+        "event.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "event.pagination.KeysetPagination",
     "PAGE_SIZE": 10,
     "DATETIME_FORMAT": "%Y-%m-%dT%H:%M:%S",
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "TEST_REQUEST_DEFAULT_FORMAT": "json",
 }
 
+# Срок действия токена (сек), выдаваемого /api/v1/auth/user/login/
+AUTH_TOKEN_MAX_AGE = env.int("AUTH_TOKEN_MAX_AGE", default=60 * 60 * 24)
+
+NOTIFICATION_BATCH_SIZE = env.int("NOTIFICATION_BATCH_SIZE", default=100)
+NOTIFICATION_MAX_ATTEMPTS = env.int("NOTIFICATION_MAX_ATTEMPTS", default=5)
+# Задержка (сек) перед первой повторной попыткой, далее удваивается
+NOTIFICATION_RETRY_DELAY = env.int("NOTIFICATION_RETRY_DELAY", default=60)
+# Окно (сек) для объединения уведомлений по событию в одно письмо-сводку,
+# 0 - отправлять письмо на каждую заявку/отзыв
+NOTIFICATION_DIGEST_WINDOW = env.int("NOTIFICATION_DIGEST_WINDOW", default=0)
+# На сколько сек пачка уведомлений закрепляется за воркером: не
+# отправленные за это время (воркер упал) возьмет другой воркер
+NOTIFICATION_SEND_TIMEOUT = env.int("NOTIFICATION_SEND_TIMEOUT", default=600)
+
+# Сколько участников встраивается в детальную информацию о событии для автора
+EVENT_PARTICIPANTS_PREVIEW_SIZE = env.int("EVENT_PARTICIPANTS_PREVIEW_SIZE", default=20)
+
+# CACHE_URL=rediscache://redis:6379/1 (django-redis) в продакшене
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+EVENT_CACHE_ALIAS = "default"
+EVENT_CACHE_TIMEOUT = env.int("EVENT_CACHE_TIMEOUT", default=300)
+# Насколько (сек) список событий может отставать от заявок и отзывов
+EVENT_LIST_CACHE_TIMEOUT = env.int("EVENT_LIST_CACHE_TIMEOUT", default=10)
+# Кэшировать события в памяти процесса (locmem), только при одном процессе:
+# иначе сброс кэша командой или другим воркером не доходит до остальных
+EVENT_CACHE_LOCAL = env.bool("EVENT_CACHE_LOCAL", default=False)
+
+# Сколько строк выбирается из БД за раз при потоковой выгрузке участников/отзывов
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
+# Сколько событий записывается одним bulk_create при импорте из файла
+EVENT_IMPORT_BATCH_SIZE = env.int("EVENT_IMPORT_BATCH_SIZE", default=1000)
+
+# Файлы отзывов: допустимые расширения и максимальный размер (байт)
+REVIEW_FILE_EXTENSIONS = env.list(
+    "REVIEW_FILE_EXTENSIONS", default=["jpg", "jpeg", "png", "gif", "pdf", "txt"]
+)
+REVIEW_FILE_MAX_SIZE = env.int("REVIEW_FILE_MAX_SIZE", default=20 * 1024 * 1024)
+# Загрузка файлов отзывов по частям: максимальный размер части и каталог
+# для недозагруженных файлов (вне MEDIA_ROOT, общий для web и воркера)
+REVIEW_UPLOAD_CHUNK_SIZE = env.int("REVIEW_UPLOAD_CHUNK_SIZE", default=1024 * 1024)
+REVIEW_UPLOAD_TEMP_DIR = env(
+    "REVIEW_UPLOAD_TEMP_DIR", default=os.path.join(BASE_DIR, "uploads")
+)
+REVIEW_UPLOAD_BATCH_SIZE = env.int("REVIEW_UPLOAD_BATCH_SIZE", default=10)
+# На сколько сек загрузка закрепляется за воркером: не обработанную за это
+# время (воркер упал) возьмет другой воркер
+REVIEW_UPLOAD_PROCESS_TIMEOUT = env.int("REVIEW_UPLOAD_PROCESS_TIMEOUT", default=600)
+# Размер превью изображений (px), превью строится, если установлен Pillow
+REVIEW_THUMBNAIL_SIZE = env.int("REVIEW_THUMBNAIL_SIZE", default=256)
+# Путь к функции проверки файла на вирусы: принимает путь к файлу и
+# возвращает False, если файл заражен. Пусто - проверка не выполняется
+REVIEW_FILE_SCANNER = env("REVIEW_FILE_SCANNER", default="")
+# Файлы и превью отзывов хранятся вне MEDIA_ROOT (nginx не раздает их
+# напрямую), в API отдаются ссылки на REVIEW_MEDIA_URL, по которым Django
+# проверяет, что файл принадлежит отзыву
+REVIEW_MEDIA_ROOT = env(
+    "REVIEW_MEDIA_ROOT", default=os.path.join(BASE_DIR, "protected_media")
+)
+REVIEW_MEDIA_URL = env("REVIEW_MEDIA_URL", default="/api/v1/review_files/")
+# Файл без ссылок удаляется, только если его не использовали столько сек:
+# параллельная загрузка того же содержимого могла еще не закоммитить отзыв.
+# Оставшиеся файлы удаляет manage.py collect_review_files
+REVIEW_FILE_RELEASE_DELAY = env.int("REVIEW_FILE_RELEASE_DELAY", default=600)
+# Файлы отдает nginx (X-Accel-Redirect) из internal location
+PROTECTED_MEDIA_URL = env("PROTECTED_MEDIA_URL", default="/protected/media/")
+
+# Постоянные соединения с БД: время жизни соединения (сек), 0 - новое
+# соединение на каждый запрос
+DB_CONN_MAX_AGE = env.int("DB_CONN_MAX_AGE", default=60)
+# Соединение, простаивавшее дольше (сек), проверяется перед запросом
+DB_HEALTH_CHECK_INTERVAL = env.int("DB_HEALTH_CHECK_INTERVAL", default=30)
+# БД за внешним пулером в transaction mode (PgBouncer): серверные курсоры
+# отключаются, потоковая выгрузка выбирает строки пачками по id
+DB_POOLER = env.bool("DB_POOLER", default=False)
+
+# Асинхронные представления горячих эндпоинтов, по умолчанию включены под
+# ASGI (SERVER=asgi): под WSGI они выполнялись бы через лишний async_to_sync.
+# ASYNC_VIEW_THREADS - потоки процесса для них, у каждого свое соединение с БД
+ASYNC_VIEWS = env.bool("ASYNC_VIEWS", default=env("SERVER", default="") == "asgi")
+ASYNC_VIEW_THREADS = env.int("ASYNC_VIEW_THREADS", default=10)
+
+# Замер запросов (Server-Timing, /api/v1/metrics/): доля замеряемых
+# запросов и порог (мс), после которого профиль cProfile замеренного
+# запроса сохраняется в PROFILING_DUMP_DIR (пусто - профиль не снимается).
+# Метрики суммируются в кэше, требуется общий для процессов CACHE_URL
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", default=False)
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.01)
+PROFILING_SLOW_THRESHOLD = env.int("PROFILING_SLOW_THRESHOLD", default=1000)
+PROFILING_DUMP_DIR = env("PROFILING_DUMP_DIR", default="")
+# Токен сборщика метрик: "Authorization: Bearer <токен>" (bearer_token в
+# Prometheus). Пусто - /api/v1/metrics/ недоступен
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
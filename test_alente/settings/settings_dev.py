@@ -28,6 +28,8 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOLER,
     }
 }
 
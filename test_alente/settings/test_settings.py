@@ -20,13 +20,18 @@ TEMPLATES = [
     },
 ]
 
+# DATABASE_URL=postgres://... позволяет прогнать тесты на PostgreSQL
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": env.db(
+        "DATABASE_URL", default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"
+    )
 }
 
+# тесты проверяют асинхронные представления, как под ASGI
+ASYNC_VIEWS = True
+
+# тесты выполняются в одном процессе, кэш событий в памяти процесса
+EVENT_CACHE_LOCAL = True
 
 EMAIL_BACKEND = env(
     "DJANGO_EMAIL_BACKEND",